@@ -2,6 +2,7 @@ import os
 import json
 import subprocess
 from typing import Dict, Optional
+from utils.mediaprobe import media_probe
 
 class VideoMusicSynchronizer:
     def __init__(self, music_path: str, cache_file: str = 'music_sync_cache.json'):
@@ -22,33 +23,31 @@ class VideoMusicSynchronizer:
 
     def get_video_duration(self, video_path: str) -> float:
         try:
-            result = subprocess.run([
-                'ffprobe', 
-                '-v', 'error', 
-                '-show_entries', 'format=duration', 
-                '-of', 'default=noprint_wrappers=1:nokey=1', 
-                video_path
-            ], capture_output=True, text=True)
-            return float(result.stdout.strip())
+            return media_probe.duration(video_path)
         except Exception as e:
             print(f"Error getting video duration: {e}")
             return 0
 
-    def sync_music_to_video(self, video_path: str, output_path: Optional[str] = None) -> str:
-        # Get video duration
-        video_duration = self.get_video_duration(video_path)
-        
-        # Determine music start point from cache or reset
+    def music_mix_filter(self, voice: str = "[0:a]", music: str = "[1:a]", output_label: str = "[aout]") -> str:
+        """filter_complex fragment that ducks the music under the voice track and normalizes loudness"""
+        return (
+            f'{voice}volume=0.8[original];'  # Reduced from 10.0 to 0.8
+            f'{music}volume=0.3[music];'      # Adjusted music volume
+            f'[original][music]amix=inputs=2:duration=first:normalize=0,'
+            f'loudnorm=I=-16:TP=-1.5:LRA=11{output_label}'  # Added normalization
+        )
+
+    def record_playback(self, video_path: str, video_duration: float):
+        """Advance the cached music start point of this video by its duration"""
         video_key = os.path.basename(video_path)
         if video_key not in self.music_sync_cache:
             self.music_sync_cache[video_key] = {'last_music_start': 0}
-        
-        # Get last music start point
-        last_music_start = self.music_sync_cache[video_key]['last_music_start']
-        
-        # Calculate music start and end points
-        music_start = last_music_start
-        music_end = music_start + video_duration
+        self.music_sync_cache[video_key]['last_music_start'] += video_duration
+        self._save_cache()
+
+    def sync_music_to_video(self, video_path: str, output_path: Optional[str] = None) -> str:
+        # Get video duration
+        video_duration = self.get_video_duration(video_path)
         
         # Prepare output path
         if output_path is None:
@@ -60,11 +59,7 @@ class VideoMusicSynchronizer:
                 'ffmpeg',
                 '-i', video_path,
                 '-i', self.music_path,
-                '-filter_complex',
-                f'[0:a]volume=0.8[original];'  # Reduced from 10.0 to 0.8
-                f'[1:a]volume=0.3[music];'      # Adjusted music volume
-                f'[original][music]amix=inputs=2:duration=first:normalize=0,'
-                'loudnorm=I=-16:TP=-1.5:LRA=11[aout]',  # Added normalization
+                '-filter_complex', self.music_mix_filter(),
                 '-map', '0:v',
                 '-map', '[aout]',
                 '-c:v', 'copy',
@@ -78,8 +73,7 @@ class VideoMusicSynchronizer:
             return video_path
         
         # Update cache with new music start point
-        self.music_sync_cache[video_key]['last_music_start'] = music_end
-        self._save_cache()
+        self.record_playback(video_path, video_duration)
         
         return output_path
 
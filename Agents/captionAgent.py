@@ -1,7 +1,20 @@
 import whisper
+import multiprocessing
 import subprocess
 import os
+import re
+import shutil
+import string
+import tempfile
+import time
+import wave
+import numpy as np
+import torch
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
+from utils.mediaprobe import media_probe
+from utils.modelregistry import model_registry
 
 def format_timestamp(seconds):
     """Convert seconds to SRT timestamp format"""
@@ -12,101 +25,453 @@ def format_timestamp(seconds):
     milliseconds = int(round((td.total_seconds() - int(td.total_seconds())) * 1000))
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
 
-def transcribe_and_caption(video_path, output_path="output.srt", model_name="base", offset=0.1,video_mode = False):
+def load_whisper(model_name="base", device=None):
+    """Whisper model from the shared model registry, loaded on first use"""
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    return model_registry.get(f"whisper/{model_name}", device,
+                              lambda: whisper.load_model(model_name, device=device))
+
+def write_captions(video_path, output_path="output.srt", model_name="base", offset=0.1):
+    """
+    Transcribe video and create caption file with word-level timestamps.
+    A small offset (in seconds) is added to each word's end timestamp for better sync.
+    Returns the path of the SRT file.
+    """
+    # Load the Whisper model
+    model = load_whisper(model_name)
+    
+    # Transcribe the video with word-level timestamps
+    print("Transcribing video...")
+    result = model.transcribe(video_path, word_timestamps=True)
+    
+    # Process segments and write SRT file
+    print("Generating captions...")
+    return write_srt(segment_cues(result["segments"], offset=offset), output_path)
+
+def segment_cues(segments, offset=0.1, shift=0.0):
+    """
+    Turn Whisper segments into (start, end, text) cues, one per word where available.
+    shift moves every cue, e.g. to place a clip's transcript on the video timeline.
+    """
+    cues = []
+    for segment in segments:
+        start_time = segment["start"]
+        end_time = segment["end"]
+        text = segment["text"].strip()
+
+        if "words" in segment:
+            for word_info in segment["words"]:
+                # Adjust the end time by adding an offset
+                word_end_adjusted = min(word_info["end"] + offset, end_time)
+                cues.append((shift + word_info["start"], shift + word_end_adjusted, word_info["word"].strip()))
+        else:
+            # Fallback if word-level timestamps are not available.
+            cues.append((shift + start_time, shift + end_time, text))
+    return cues
+
+# Whisper model of a transcription worker process, loaded once by _init_whisper_worker
+_worker_model = None
+
+def _init_whisper_worker(model_name, threads):
+    global _worker_model
+    # Split the cores between the workers instead of letting each one use all of them
+    torch.set_num_threads(threads)
+    # The workers split the CPU cores; the GPU stays with the parent's models
+    _worker_model = load_whisper(model_name, device="cpu")
+
+def _transcribe_clip(audio_path):
+    result = _worker_model.transcribe(audio_path, word_timestamps=True)
+    return result["segments"]
+
+def write_clip_captions(voice_clips, output_path="output.srt", model_name="base", offset=0.1, workers=None):
+    """
+    Transcribe the voice clips in parallel and merge them into one caption file.
+
+    Each worker process loads the Whisper model on the CPU once and transcribes whole
+    clips, so wall time scales with the number of cores instead of the video length.
+    Workers are spawned, not forked: by caption time the parent usually holds CUDA
+    models, and CUDA can't be used in a forked child. Word timestamps are shifted by
+    each clip's start in the edited video.
+
+    Args:
+        voice_clips: One {'audio_path', 'start'} dict per voice clip, in video order.
+        workers: Number of worker processes. Defaults to one per clip, up to the CPU count.
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = workers or min(len(voice_clips), cpu_count)
+    threads = max(1, cpu_count // workers)
+    print(f"Transcribing {len(voice_clips)} clips with {workers} workers...")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_whisper_worker, initargs=(model_name, threads)) as pool:
+        clip_segments = list(pool.map(_transcribe_clip, [clip['audio_path'] for clip in voice_clips]))
+
+    cues = []
+    for clip, segments in zip(voice_clips, clip_segments):
+        cues += segment_cues(segments, offset=offset, shift=clip['start'])
+    print("Generating captions...")
+    return write_srt(cues, output_path)
+
+def write_srt(cues, output_path="output.srt"):
+    """Write (start, end, text) cues to an SRT file"""
+    with open(output_path, "w", encoding="utf-8") as srt_file:
+        for srt_index, (start_time, end_time, text) in enumerate(cues, 1):
+            srt_file.write(f"{srt_index}\n")
+            srt_file.write(f"{format_timestamp(start_time)} --> {format_timestamp(end_time)}\n")
+            srt_file.write(f"{text}\n\n")
+    return output_path
+
+def read_wav(path):
+    """Mono float samples and sample rate of a PCM WAV file"""
+    with wave.open(path, "rb") as wav_file:
+        rate = wav_file.getframerate()
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        frames = wav_file.readframes(wav_file.getnframes())
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[sample_width]
+    samples = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128
+    return samples.reshape(-1, channels).mean(axis=1), rate
+
+def speech_spans(samples, rate, frame_seconds=0.01, min_pause=0.12):
+    """Voiced regions of a clip as (start, end) seconds, from short-time energy"""
+    hop = max(1, int(rate * frame_seconds))
+    frames = len(samples) // hop
+    if frames == 0:
+        return []
+    energy = np.sqrt((samples[:frames * hop].reshape(frames, hop) ** 2).mean(axis=1))
+    if energy.max() == 0:
+        return []
+    # TTS output has clean silence, so a fraction of the peak separates speech from pauses
+    voiced = energy > energy.max() * 0.05
+
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    spans = []
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        # Merge gaps too short to be a pause between words
+        if spans and (start - spans[-1][1]) * frame_seconds < min_pause:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    return [(start * frame_seconds, end * frame_seconds) for start, end in spans]
+
+def align_words(words, spans, duration):
+    """
+    Spread words over the voiced parts of a clip in proportion to their length.
+    Without voiced spans the words are spread over the whole clip instead.
+    Returns (start, end, word) tuples in clip time.
+    """
+    if not spans:
+        spans = [(0.0, duration)]
+    span_starts = np.array([start for start, _ in spans])
+    span_lengths = np.array([end - start for start, end in spans])
+    cumulative = np.concatenate(([0.0], np.cumsum(span_lengths)))
+    voiced_total = cumulative[-1]
+
+    # +1 so that short words and numbers still get some screen time
+    weights = np.array([len(word.strip(string.punctuation)) + 1 for word in words], dtype=np.float64)
+    bounds = np.concatenate(([0.0], np.cumsum(weights))) / weights.sum() * voiced_total
+
+    def to_clip_time(voiced_time, side):
+        # An end on a span boundary belongs to the earlier span, a start to the later one
+        idx = min(max(np.searchsorted(cumulative, voiced_time, side=side) - 1, 0), len(spans) - 1)
+        return float(span_starts[idx] + voiced_time - cumulative[idx])
+
+    return [
+        (to_clip_time(bounds[i], "right"), to_clip_time(bounds[i + 1], "left"), word)
+        for i, word in enumerate(words)
+    ]
+
+def write_script_captions(script_clips, output_path="output.srt", offset=0.1):
+    """
+    Create word-level captions from the known voice scripts instead of running Whisper.
+
+    Args:
+        script_clips: One {'text', 'audio_path', 'start'} dict per voice clip, where
+            start is the clip's offset in the edited video.
+        offset: Seconds added to each word's end timestamp, as in write_captions.
+    """
+    cues = []
+    for clip in script_clips:
+        words = clip['text'].split()
+        if not words:
+            continue
+        try:
+            samples, rate = read_wav(clip['audio_path'])
+            duration = len(samples) / rate
+            spans = speech_spans(samples, rate)
+        except (wave.Error, EOFError, KeyError):
+            # Not a PCM WAV: fall back to proportional timing over the whole clip
+            duration = media_probe.duration(clip['audio_path'])
+            spans = []
+        for word_start, word_end, word in align_words(words, spans, duration):
+            word_end_adjusted = min(word_end + offset, duration)
+            cues.append((clip['start'] + word_start, clip['start'] + word_end_adjusted, word))
+    print(f"Generated {len(cues)} captions from the voice scripts")
+    return write_srt(cues, output_path)
+
+# libass lays out SRT subtitles on a 288 pixel tall canvas and scales it to the video
+LIBASS_PLAY_RES_Y = 288
+CAPTION_MARGIN = 50
+CAPTION_OUTLINE = 8
+CAPTION_BLUR = 20
+CAPTION_FONTS = ("impact.ttf", "Impact.ttf", "DejaVuSans-Bold.ttf")
+
+def caption_font_size(height, video_mode=False):
+    """Caption font size in libass units, proportional to video height"""
+    if video_mode:
+        return int(height * 0.02)
+    return int(height * 0.007)
+
+def read_srt(srt_path):
+    """Parse an SRT file into (start, end, text) cues"""
+    def to_seconds(timestamp):
+        hours, minutes, rest = timestamp.split(":")
+        secs, millis = rest.split(",")
+        return int(hours) * 3600 + int(minutes) * 60 + int(secs) + int(millis) / 1000
+
+    with open(srt_path, "r", encoding="utf-8") as srt_file:
+        blocks = re.split(r"\n\s*\n", srt_file.read().strip())
+    cues = []
+    for block in blocks:
+        lines = block.strip().splitlines()
+        if len(lines) < 3 or "-->" not in lines[1]:
+            continue
+        start, end = (to_seconds(part.strip()) for part in lines[1].split("-->"))
+        cues.append((start, end, "\n".join(lines[2:])))
+    return cues
+
+def _load_caption_font(pixel_size):
+    for font_name in CAPTION_FONTS:
+        try:
+            return ImageFont.truetype(font_name, pixel_size)
+        except OSError:
+            continue
+    print("Caption font not found, using PIL's default font")
+    return ImageFont.load_default()
+
+def _wrap_caption(text, font, max_width):
+    """Break caption text into lines no wider than max_width, like libass does"""
+    lines = []
+    for paragraph in text.splitlines():
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}".strip()
+            if line and font.getlength(candidate) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return "\n".join(lines)
+
+def render_caption_sprites(srt_path, width, height, video_mode=False, sprite_dir=None):
+    """
+    Pre-render one glow sprite per distinct caption and write a concat demuxer
+    list that shows each sprite for its cue's duration.
+
+    A sprite covers only the caption band at the bottom of the frame, and its glow
+    (outlined text, box blurred) is rendered once per distinct caption instead of
+    blurring the whole frame on every frame. Sizes follow the libass layout of
+    glow_caption_filter: font size, margin and outline are scaled by height / 288.
+    Returns the path of the concat list; overlay it with sprite_caption_filter.
+    Without sprite_dir the sprites go to a fresh temporary directory, so concurrent
+    renders never share one; remove it with remove_caption_sprites after ffmpeg ran.
+    """
+    if sprite_dir:
+        os.makedirs(sprite_dir, exist_ok=True)
+    else:
+        sprite_dir = tempfile.mkdtemp(prefix="caption_sprites_")
+
+    scale = height / LIBASS_PLAY_RES_Y
+    font = _load_caption_font(max(1, round(caption_font_size(height, video_mode) * scale)))
+    margin = round(CAPTION_MARGIN * scale)
+    outline = max(1, round(CAPTION_OUTLINE * scale))
+    # Room for the outline and the blur to fade out around the text
+    pad = outline + 2 * CAPTION_BLUR
+
+    cues = sorted(read_srt(srt_path))
+    texts = {text: _wrap_caption(text, font, width * 0.9) for _, _, text in cues}
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    text_height = max(
+        (measure.multiline_textbbox((0, 0), text, font=font, stroke_width=outline)[3] for text in texts.values()),
+        default=0
+    )
+    band_height = min(height, margin + text_height + pad)
+    band_height += band_height % 2
+
+    def sprite(text=None):
+        layer = Image.new("RGBA", (width, band_height), (255, 255, 255, 0))
+        if text:
+            anchor_xy = (width / 2, band_height - margin)
+            ImageDraw.Draw(layer).multiline_text(anchor_xy, text, font=font, fill=(255, 255, 255, 255),
+                                                 anchor="md", align="center",
+                                                 stroke_width=outline, stroke_fill=(255, 255, 255, 255))
+            layer = layer.filter(ImageFilter.BoxBlur(CAPTION_BLUR))
+            ImageDraw.Draw(layer).multiline_text(anchor_xy, text, font=font, fill=(255, 255, 255, 255),
+                                                 anchor="md", align="center")
+        return layer
+
+    blank_path = os.path.join(sprite_dir, "blank.png")
+    sprite().save(blank_path)
+    sprite_paths = {}
+    for sprite_idx, (text, wrapped) in enumerate(texts.items()):
+        sprite_paths[text] = os.path.join(sprite_dir, f"sprite_{sprite_idx}.png")
+        sprite(wrapped).save(sprite_paths[text])
+
+    entries = []
+    current_time = 0.0
+    for start, end, text in cues:
+        if start > current_time:
+            entries.append((blank_path, start - current_time))
+            current_time = start
+        if end > current_time:
+            entries.append((sprite_paths[text], end - current_time))
+            current_time = end
+    entries.append((blank_path, 0.04))
+
+    list_path = os.path.join(sprite_dir, "sprites.txt")
+    with open(list_path, "w", encoding="utf-8") as list_file:
+        for path, duration in entries:
+            list_file.write(f"file '{os.path.abspath(path).replace(os.sep, '/')}'\n")
+            list_file.write(f"duration {duration:.6f}\n")
+        # The concat demuxer ignores the last duration unless the file is listed again
+        list_file.write(f"file '{os.path.abspath(blank_path).replace(os.sep, '/')}'\n")
+    print(f"Rendered {len(sprite_paths)} caption sprites ({width}x{band_height})")
+    return list_path
+
+def sprite_caption_inputs(list_path):
+    """ffmpeg input arguments for a sprite list from render_caption_sprites"""
+    return ["-f", "concat", "-safe", "0", "-i", list_path]
+
+def remove_caption_sprites(caption_inputs):
+    """Delete the sprite directory behind caption_stage's inputs, if it made one"""
+    if caption_inputs:
+        shutil.rmtree(os.path.dirname(caption_inputs[-1]), ignore_errors=True)
+
+def sprite_caption_filter(source="[0:v]", sprites="[1:v]", output_label=""):
+    """Overlay the caption sprite track on the bottom of the `source` video stream"""
+    return (
+        f"{sprites}format=rgba[captions]; "
+        f"{source}[captions]overlay=0:main_h-overlay_h:eof_action=pass{output_label}"
+    )
+
+def caption_stage(srt_path, width, height, video_mode=False, compositor="libass",
+                  source="[0:v]", sprite_input=1, output_label=""):
+    """
+    Extra ffmpeg inputs and the filter_complex fragment for burning in captions.
+    compositor is "libass" (glow_caption_filter) or "sprites" (pre-rendered glow
+    sprites, see render_caption_sprites), whose track becomes input sprite_input.
+    Pass the returned inputs to remove_caption_sprites once ffmpeg has finished.
+    """
+    if compositor == "sprites":
+        list_path = render_caption_sprites(srt_path, width, height, video_mode)
+        return sprite_caption_inputs(list_path), sprite_caption_filter(
+            source=source, sprites=f"[{sprite_input}:v]", output_label=output_label
+        )
+    if compositor != "libass":
+        raise ValueError(f"Unknown caption compositor: {compositor}")
+    return [], glow_caption_filter(srt_path, height, video_mode=video_mode, source=source,
+                                   output_label=output_label)
+
+def benchmark_caption_compositors(video_path, srt_path="output.srt", video_mode=False,
+                                  compositors=("libass", "sprites")):
+    """
+    Run each caption compositor over video_path into the null muxer (no encode) and
+    report milliseconds per frame. Sprite rendering time is included.
+    """
+    width, height = media_probe.dimensions(video_path)
+    results = {}
+    for compositor in compositors:
+        start = time.perf_counter()
+        inputs, caption_filter = caption_stage(srt_path, width, height, video_mode, compositor)
+        try:
+            completed = subprocess.run(
+                ["ffmpeg", "-y", "-i", video_path, *inputs, "-filter_complex", caption_filter,
+                 "-an", "-f", "null", "-"],
+                check=True, capture_output=True, text=True
+            )
+        finally:
+            remove_caption_sprites(inputs)
+        elapsed = time.perf_counter() - start
+        frames = re.findall(r"frame=\s*(\d+)", completed.stderr)
+        frame_count = int(frames[-1]) if frames else 0
+        results[compositor] = {
+            "seconds": elapsed,
+            "frames": frame_count,
+            "ms_per_frame": elapsed * 1000 / frame_count if frame_count else None
+        }
+        print(f"{compositor:>7}: {elapsed:.2f}s for {frame_count} frames "
+              f"({results[compositor]['ms_per_frame'] or 0:.2f} ms/frame)")
+    return results
+
+def glow_caption_filter(srt_path, height, video_mode=False, source="[0:v]", output_label=""):
+    """
+    Build the filter_complex fragment that burns glowing captions from srt_path
+    into the `source` video stream, ending in `output_label` (if given).
+    """
+    bottom_padding = CAPTION_MARGIN  # Vertical margin for captions
+    font_size = caption_font_size(height, video_mode)
+    return (
+        # Split into three streams.
+        f"{source}split=3[base][glow][sharp]; "
+        # Glow layer: use a thick outline (Outline=8), no shadow, no back color.
+        f"[glow]subtitles={srt_path}:force_style='FontName=Impact,"
+        f"FontSize={font_size},"
+        f"PrimaryColour=&HFFFFFF&,"
+        f"Outline=8,"
+        f"Shadow=0,"
+        f"BorderStyle=1,"
+        f"Alignment=2,"
+        f"MarginV={bottom_padding}'[s_glow]; "
+        # Apply heavy blur to the glow layer.
+        f"[s_glow]boxblur=20:20[s_blur]; "
+        # Sharp layer: clean white text with no outline.
+        f"[sharp]subtitles={srt_path}:force_style='FontName=Impact,"
+        f"FontSize={font_size},"
+        f"PrimaryColour=&HFFFFFF&,"
+        f"Outline=0,"
+        f"Shadow=0,"
+        f"BorderStyle=1,"
+        f"Alignment=2,"
+        f"MarginV={bottom_padding}'[s_sharp]; "
+        # Overlay the blurred glow over the base, then overlay the sharp text.
+        f"[base][s_blur]overlay[tmp]; "
+        f"[tmp][s_sharp]overlay{output_label}"
+    )
+
+def transcribe_and_caption(video_path, output_path="output.srt", model_name="base", offset=0.1,video_mode = False,
+                           script_clips=None, voice_clips=None, compositor="libass"):
     """
     Transcribe video and create caption file with word-level timestamps.
     A small offset (in seconds) is added to each word's end timestamp for better sync.
     Then, burn glowing captions into the video.
+    With script_clips (see write_script_captions) the captions come from the known
+    scripts and clip offsets and Whisper is not run. With voice_clips (see
+    write_clip_captions) the voice clips are transcribed in parallel instead of the video.
+    compositor="sprites" burns the captions in from pre-rendered glow sprites (see caption_stage).
     """
     try:
-        # Load the Whisper model
-        print(f"Loading {model_name} model...")
-        model = whisper.load_model(model_name)
-        
-        # Transcribe the video with word-level timestamps
-        print("Transcribing video...")
-        result = model.transcribe(video_path, word_timestamps=True)
+        if script_clips:
+            write_script_captions(script_clips, output_path, offset=offset)
+        elif voice_clips:
+            write_clip_captions(voice_clips, output_path, model_name=model_name, offset=offset)
+        else:
+            write_captions(video_path, output_path, model_name=model_name, offset=offset)
         
-        # Process segments and write SRT file
-        print("Generating captions...")
-        srt_index = 1
-        with open(output_path, "w", encoding="utf-8") as srt_file:
-            for segment in result["segments"]:
-                start_time = segment["start"]
-                end_time = segment["end"]
-                text = segment["text"].strip()
-                
-                if "words" in segment:
-                    for word_info in segment["words"]:
-                        word_start = word_info["start"]
-                        word_end = word_info["end"]
-                        word_text = word_info["word"].strip()
-                        
-                        # Adjust the end time by adding an offset
-                        word_end_adjusted = min(word_end + offset, end_time)
-                        
-                        # Write SRT entry for each word
-                        srt_file.write(f"{srt_index}\n")
-                        srt_file.write(f"{format_timestamp(word_start)} --> {format_timestamp(word_end_adjusted)}\n")
-                        srt_file.write(f"{word_text}\n\n")
-                        srt_index += 1
-                else:
-                    # Fallback if word-level timestamps are not available.
-                    srt_file.write(f"{srt_index}\n")
-                    srt_file.write(f"{format_timestamp(start_time)} --> {format_timestamp(end_time)}\n")
-                    srt_file.write(f"{text}\n\n")
-                    srt_index += 1
-        
-        # Get video dimensions using ffprobe
-        probe_cmd = [
-            "ffprobe", "-v", "error", "-select_streams", "v:0",
-            "-show_entries", "stream=width,height",
-            "-of", "csv=s=x:p=0", video_path
-        ]
-        dimensions = subprocess.check_output(probe_cmd, universal_newlines=True).strip()
-        width, height = map(int, dimensions.split('x'))
+        # Get video dimensions
+        width, height = media_probe.dimensions(video_path)
         
         # Ensure the output directory exists
         output_dir = "output"
         os.makedirs(output_dir, exist_ok=True)
         output_video = os.path.join(output_dir, "output_with_glowing_captions.mp4")
-        bottom_padding = 50  # Vertical margin for captions
         
-        # Calculate font size proportional to video height
-        font_size = int(height * 0.007)
-        if video_mode:
-            font_size = int(height * 0.02)
         # Build FFmpeg command using filter_complex to create a glowing subtitle effect:
+        caption_inputs, caption_filter = caption_stage(output_path, width, height, video_mode, compositor)
         ffmpeg_command = [
-            "ffmpeg", "-i", video_path,
-            "-filter_complex",
-            (
-                # Split into three streams.
-                f"[0:v]split=3[base][glow][sharp]; "
-                # Glow layer: use a thick outline (Outline=8), no shadow, no back color.
-                f"[glow]subtitles={output_path}:force_style='FontName=Impact,"
-                f"FontSize={font_size},"
-                f"PrimaryColour=&HFFFFFF&,"
-                f"Outline=8,"
-                f"Shadow=0,"
-                f"BorderStyle=1,"
-                f"Alignment=2,"
-                f"MarginV={bottom_padding}'[s_glow]; "
-                # Apply heavy blur to the glow layer.
-                f"[s_glow]boxblur=20:20[s_blur]; "
-                # Sharp layer: clean white text with no outline.
-                f"[sharp]subtitles={output_path}:force_style='FontName=Impact,"
-                f"FontSize={font_size},"
-                f"PrimaryColour=&HFFFFFF&,"
-                f"Outline=0,"
-                f"Shadow=0,"
-                f"BorderStyle=1,"
-                f"Alignment=2,"
-                f"MarginV={bottom_padding}'[s_sharp]; "
-                # Overlay the blurred glow over the base, then overlay the sharp text.
-                f"[base][s_blur]overlay[tmp]; "
-                f"[tmp][s_sharp]overlay"
-            ),
+            "ffmpeg", "-i", video_path, *caption_inputs,
+            "-filter_complex", caption_filter,
             "-c:v", "libx264",
             "-preset", "fast",
             "-crf", "23",
@@ -116,7 +481,10 @@ def transcribe_and_caption(video_path, output_path="output.srt", model_name="bas
         ]
         
         print("Adding glowing captions to video...")
-        subprocess.run(ffmpeg_command, check=True)
+        try:
+            subprocess.run(ffmpeg_command, check=True)
+        finally:
+            remove_caption_sprites(caption_inputs)
         
         print(f"Process completed! Captioned video saved as {output_video}")
         return output_video
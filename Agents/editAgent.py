@@ -1,13 +1,70 @@
 import os
 import subprocess
-from PIL import Image
-from pydub import AudioSegment
+import numpy as np
+from PIL import Image, ImageFilter
 import shutil
 import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from utils.filecache import FileCache
+from utils.mediaprobe import media_probe
+from utils.scenemanifest import (scene_layout, file_hash, load_scene_manifest, save_scene_manifest,
+                                 refresh_scene_manifest, diff_scene_manifests)
 
 class VideoEditor:
-    def __init__(self,video_mode: bool = False):
+    # Output size of each rendition create_renditions can produce
+    RENDITION_SIZES = {
+        "shorts": (1080, 1920),
+        "video": (1920, 1080)
+    }
+
+    def __init__(self,video_mode: bool = False, render_mode: str = "segments",
+                 workers: int = None, x264_threads: int = None,
+                 cache_dir: str = None, cache_max_bytes: int = 2 * 1024 ** 3,
+                 frame_feed: str = "png", motion_engine: str = "ffmpeg",
+                 tier: str = "final", draft_scale: float = 1 / 3,
+                 scene_cache_dir: str = None):
+        """
+        Args:
+            video_mode: Render 1920x1080 instead of 1080x1920 Shorts.
+            render_mode: "segments" encodes every image separately and concatenates
+                the pieces, "parallel" does the same with scenes spread over a process
+                pool, "filtergraph" renders the whole timeline in one ffmpeg pass.
+            workers: Number of scenes rendered at once in "parallel" mode.
+            x264_threads: Thread cap for each libx264 encode (defaults to 2 in "parallel" mode).
+            cache_dir: Keep rendered image segments here and reuse them across renders.
+            cache_max_bytes: Size cap of the segment cache before old segments are evicted.
+            frame_feed: "png" writes each resized still to disk for ffmpeg to read back,
+                "raw" pipes the decoded RGB frame straight into ffmpeg's stdin.
+            motion_engine: "ffmpeg" animates stills with zoompan/crop filters, "numpy"
+                computes sub-pixel crop windows in NumPy and streams finished frames.
+            tier: "final" renders full quality, "draft" renders a quick preview at
+                draft_scale of the resolution with ultrafast x264 and no zoom effect.
+            draft_scale: Resolution factor used by the "draft" tier.
+            scene_cache_dir: Keep each rendered scene (images plus narration) here so
+                unchanged scenes are re-spliced instead of rebuilt on the next render.
+                Only the "segments" and "parallel" modes render scene by scene and use it.
+        """
         self.temp_dir = tempfile.mkdtemp()
+        self.render_mode = render_mode
+        self.fps = 30
+        self.frame_feed = frame_feed
+        self.motion_engine = motion_engine
+        self.motion_headroom = 1.2  # Upscale factor of the numpy engine's source image
+        self.tier = tier
+        self.draft_scale = draft_scale
+        if render_mode == "parallel" and not x264_threads:
+            x264_threads = 2
+        self.x264_threads = x264_threads
+        self.workers = workers or max(1, (os.cpu_count() or 1) // (x264_threads or 1))
+        self.last_render_stats = None
+        self.last_clip_offsets = []
+        self.segment_cache = FileCache(cache_dir, cache_max_bytes, extension=".mp4") if cache_dir else None
+        self.scene_cache = FileCache(scene_cache_dir, cache_max_bytes, extension=".mp4") if scene_cache_dir else None
+        if self.scene_cache and render_mode == "filtergraph":
+            print("Warning: the filtergraph render mode renders the whole timeline in one pass and "
+                  "ignores the scene cache; use segments or parallel to rebuild only changed scenes")
         if video_mode:
             print("Video mode")
             self.width = 1920  # YouTube video width
@@ -16,6 +73,11 @@ class VideoEditor:
             print("Shorts mode")
             self.width = 1080  # YouTube Shorts width (portrait)
             self.height = 1920 # YouTube Shorts height
+        if tier == "draft":
+            # x264 with yuv420p needs even dimensions
+            self.width = int(self.width * draft_scale) // 2 * 2
+            self.height = int(self.height * draft_scale) // 2 * 2
+            print(f"Draft tier ({self.width}x{self.height})")
         
     def validate_files(self, image_dir, voice_dir,video_mode: bool = False, channel: str = None):
         """Validate that we have the correct number of files and maintain folder order"""
@@ -41,11 +103,10 @@ class VideoEditor:
 
     def get_audio_duration(self, audio_path):
         """Get duration of audio file in seconds"""
-        audio = AudioSegment.from_file(audio_path)
-        return len(audio) / 1000.0
+        return media_probe.duration(audio_path)
 
-    def resize_image(self, image_path, output_path):
-        """Resize image to fit YouTube Shorts dimensions"""
+    def letterbox(self, image_path):
+        """Resize image to fit YouTube Shorts dimensions and return it centered on a black canvas"""
         with Image.open(image_path) as img:
             # Calculate new dimensions maintaining aspect ratio
             ratio = min(self.width / img.width, self.height / img.height)
@@ -61,151 +122,469 @@ class VideoEditor:
             x = (self.width - new_size[0]) // 2
             y = (self.height - new_size[1]) // 2
             new_img.paste(resized, (x, y))
-            
-            new_img.save(output_path, 'PNG')
+            return new_img
 
-    def create_video_segment(self, image_path, duration, output_path, effect_type="zoom"):
-        """Create video segment with zoom/pan effect"""
-        # Resize image first
-        temp_img_path = os.path.join(self.temp_dir, 'temp_resized.png')
-        self.resize_image(image_path, temp_img_path)
-        
-        # Define filter based on effect type
+    def resize_image(self, image_path, output_path):
+        """Resize image to fit YouTube Shorts dimensions"""
+        self.letterbox(image_path).save(output_path, 'PNG')
+
+    def tier_effect(self, effect_type):
+        """Swap the expensive zoom for a plain fade when rendering drafts"""
+        if self.tier == "draft" and effect_type == "zoom":
+            return "fade"
+        return effect_type
+
+    def effect_filter(self, effect_type, duration, zoom_fps=None, size=None):
+        """Build the ffmpeg filter chain for one image's zoom/slide/fade/pan effect"""
+        width, height = size or (self.width, self.height)
         if effect_type == "zoom":
-            filter_complex = (
-                f"[0:v]scale={self.width}:{self.height},"
+            chain = (
+                f"scale={width}:{height},"
                 f"zoompan=z='if(lte(zoom,1.0),1.1,max(1.001,zoom-0.0015))':"
-                f"d={int(duration*30)}:s={self.width}x{self.height}[v]"
+                f"d={int(duration*30)}:s={width}x{height}"
             )
+            if zoom_fps:
+                chain += f":fps={zoom_fps}"
+            return chain
         elif effect_type == "slide":
-            filter_complex = (
-                f"[0:v]scale={self.width}:{self.height},"
-                f"crop={self.width}:{self.height}:x='(iw-{self.width})*t/{duration}':y=0,"
-                f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2[v]"
+            return (
+                f"scale={width}:{height},"
+                f"crop={width}:{height}:x='(iw-{width})*t/{duration}':y=0,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
             )
         elif effect_type == "fade":
             # This example creates a fade-in effect over the first 1 second.
-            filter_complex = (
-                f"[0:v]scale={self.width}:{self.height},fade=t=in:st=0:d=1[v]"
-            )
-
+            return f"scale={width}:{height},fade=t=in:st=0:d=1"
         else:  # pan effect
-            filter_complex = (
-                f"[0:v]scale={self.width}:{self.height},"
-                f"crop={self.width}:{self.height}:"
+            return (
+                f"scale={width}:{height},"
+                f"crop={width}:{height}:"
                 f"iw/2-(iw/2)*sin(t/5):"
-                f"ih/2-(ih/2)*sin(t/7)[v]"
+                f"ih/2-(ih/2)*sin(t/7)"
+            )
+
+    def encoder_args(self):
+        """libx264 output options shared by every video encode"""
+        if self.tier == "draft":
+            args = ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'ultrafast', '-crf', '30']
+        else:
+            args = ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'medium']
+        if self.x264_threads:
+            args += ['-threads', str(self.x264_threads)]
+        return args
+
+    def create_video_segment(self, image_path, duration, output_path, effect_type="zoom"):
+        """
+        Create video segment with zoom/pan effect.
+
+        Returns the time spent preparing the still and encoding the segment:
+            {'prepare_seconds', 'encode_seconds', 'cached'}
+        """
+        effect_type = self.tier_effect(effect_type)
+
+        # Resize image first (one file per segment so parallel renders don't collide)
+        prepare_start = time.perf_counter()
+        segment_name = os.path.splitext(os.path.basename(output_path))[0]
+        temp_img_path = os.path.join(self.temp_dir, f'{segment_name}_resized.png')
+        resized = self.letterbox(image_path)
+
+        cache_key = None
+        if self.segment_cache:
+            cache_key = self.segment_cache.make_key(
+                resized.tobytes(), f"{duration:.6f}", effect_type, self.motion_engine,
+                f"{self.width}x{self.height}", *self.encoder_args()
             )
+            if self.segment_cache.fetch(cache_key, output_path):
+                return {'prepare_seconds': time.perf_counter() - prepare_start, 'encode_seconds': 0.0, 'cached': True}
+
+        if self.motion_engine == "numpy":
+            prepare_seconds = time.perf_counter() - prepare_start
+            encode_start = time.perf_counter()
+            self.render_motion_segment(resized, duration, output_path, effect_type)
+            encode_seconds = time.perf_counter() - encode_start
+            if cache_key:
+                self.segment_cache.store(cache_key, output_path)
+            return {'prepare_seconds': prepare_seconds, 'encode_seconds': encode_seconds, 'cached': False}
+
+        if self.frame_feed == "raw":
+            # Send the canvas once as a raw frame on stdin and let the loop filter repeat it,
+            # at the same 25 fps the image2 demuxer uses for -loop 1
+            frame = resized.tobytes()
+            input_args = [
+                '-f', 'rawvideo',
+                '-pix_fmt', 'rgb24',
+                '-s', f'{self.width}x{self.height}',
+                '-framerate', '25',
+                '-i', 'pipe:0'
+            ]
+            loop_filter = "loop=loop=-1:size=1,"
+        else:
+            frame = None
+            resized.save(temp_img_path, 'PNG')
+            input_args = ['-loop', '1', '-i', temp_img_path]
+            loop_filter = ""
+        prepare_seconds = time.perf_counter() - prepare_start
+        
+        filter_complex = f"[0:v]{loop_filter}{self.effect_filter(effect_type, duration)}[v]"
 
         zoom_cmd = [
             'ffmpeg', '-y',
-            '-loop', '1',
-            '-i', temp_img_path,
+            *input_args,
             '-t', str(duration),
             '-filter_complex', filter_complex,
             '-map', '[v]',
-            '-c:v', 'libx264',
-            '-pix_fmt', 'yuv420p',
-            '-preset', 'medium',
+            *self.encoder_args(),
             output_path
         ]
         
-        subprocess.run(zoom_cmd, check=True)
+        encode_start = time.perf_counter()
+        subprocess.run(zoom_cmd, input=frame, check=True)
+        encode_seconds = time.perf_counter() - encode_start
+        if cache_key:
+            self.segment_cache.store(cache_key, output_path)
+        return {'prepare_seconds': prepare_seconds, 'encode_seconds': encode_seconds, 'cached': False}
+
+    def motion_windows(self, effect_type, duration, source_width, source_height):
+        """
+        Compute the crop window of every frame of an effect as NumPy arrays.
+
+        Windows are float rectangles in source pixels, so motion stays sub-pixel
+        smooth instead of snapping to whole pixels like zoompan does.
+
+        Returns:
+            (x, y, w, h, brightness) arrays with one value per frame
+        """
+        frames = max(1, int(round(duration * self.fps)))
+        t = np.arange(frames, dtype=np.float64) / self.fps
+        ones = np.ones(frames)
+        brightness = ones
+
+        if effect_type == "zoom":
+            # Same curve as the zoompan expression: start at 1.1x and ease back towards 1x
+            zoom = np.maximum(1.001, 1.1 - 0.0015 * np.arange(frames))
+            w = source_width / zoom
+            h = source_height / zoom
+            x = (source_width - w) / 2
+            y = (source_height - h) / 2
+        elif effect_type == "slide":
+            w = ones * self.width
+            h = ones * self.height
+            x = (source_width - self.width) * t / duration
+            y = ones * (source_height - self.height) / 2
+        elif effect_type == "fade":
+            # Whole image, fading in over the first second
+            w = ones * source_width
+            h = ones * source_height
+            x = y = np.zeros(frames)
+            brightness = np.clip(t, 0.0, 1.0)
+        else:  # pan effect
+            w = ones * self.width
+            h = ones * self.height
+            x = (source_width - self.width) / 2 * (1 - np.sin(t / 5))
+            y = (source_height - self.height) / 2 * (1 - np.sin(t / 7))
+
+        return x, y, w, h, brightness
+
+    def render_motion_segment(self, resized, duration, output_path, effect_type="zoom"):
+        """Animate a letterboxed still with the numpy engine and stream the frames to libx264"""
+        source = resized.resize(
+            (int(self.width * self.motion_headroom), int(self.height * self.motion_headroom)),
+            Image.Resampling.LANCZOS
+        )
+        x, y, w, h, brightness = self.motion_windows(effect_type, duration, source.width, source.height)
+
+        cmd = [
+            'ffmpeg', '-y',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}',
+            '-framerate', str(self.fps),
+            '-i', 'pipe:0',
+            *self.encoder_args(),
+            output_path
+        ]
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        try:
+            last_box = None
+            frame = None
+            for i in range(len(x)):
+                box = (x[i], y[i], x[i] + w[i], y[i] + h[i])
+                # Static windows (fade) only need to be resampled once
+                if box != last_box:
+                    frame = np.asarray(source.resize((self.width, self.height), Image.Resampling.BILINEAR, box=box))
+                    last_box = box
+                if brightness[i] < 1.0:
+                    process.stdin.write((frame * brightness[i]).astype(np.uint8).tobytes())
+                else:
+                    process.stdin.write(frame.tobytes())
+            process.stdin.close()
+        except BrokenPipeError:
+            # ffmpeg exited early (bad arguments, full disk); its return code below says why
+            pass
+        finally:
+            with suppress(BrokenPipeError):
+                process.stdin.close()
+            returncode = process.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd)
+
+    def _benchmark_segment(self, image_path, duration, effect_type, attribute, values):
+        """Time create_video_segment for each value of one editor attribute, bypassing the cache"""
+        os.makedirs(self.temp_dir, exist_ok=True)
+        original_value, original_cache = getattr(self, attribute), self.segment_cache
+        self.segment_cache = None
+        results = {}
+        try:
+            for value in values:
+                setattr(self, attribute, value)
+                output_path = os.path.join(self.temp_dir, f'benchmark_{attribute}_{value}_{effect_type}.mp4')
+                timing = self.create_video_segment(image_path, duration, output_path, effect_type)
+                results[value] = timing['prepare_seconds'] + timing['encode_seconds']
+        finally:
+            setattr(self, attribute, original_value)
+            self.segment_cache = original_cache
+        return results
+
+    def benchmark_frame_feed(self, image_path, duration=3.0, effect_type="fade"):
+        """Render one segment through the PNG and the raw frame feed and compare the timings"""
+        results = self._benchmark_segment(image_path, duration, effect_type, 'frame_feed', ("png", "raw"))
+        print(f"png feed: {results['png']:.2f}s, raw feed: {results['raw']:.2f}s, "
+              f"saved {results['png'] - results['raw']:.2f}s per scene")
+        return results
+
+    def benchmark_render_modes(self, image_dir, voice_dir, video_mode=False, channel=None,
+                               modes=("segments", "parallel")):
+        """
+        Render the same timeline in each render mode, without caches, and compare the
+        wall times. Speedups are relative to the first mode.
+        """
+        results = {}
+        with tempfile.TemporaryDirectory() as output_dir:
+            for mode in modes:
+                editor = VideoEditor(video_mode=video_mode, render_mode=mode, frame_feed=self.frame_feed,
+                                     motion_engine=self.motion_engine, tier=self.tier,
+                                     draft_scale=self.draft_scale)
+                start = time.perf_counter()
+                editor.create_final_video(image_dir, voice_dir, os.path.join(output_dir, f"{mode}.mp4"),
+                                          video_mode=video_mode, channel=channel)
+                results[mode] = time.perf_counter() - start
+        baseline = results[modes[0]]
+        for mode in modes:
+            print(f"{mode:>11}: {results[mode]:.1f}s ({baseline / results[mode]:.2f}x vs {modes[0]})")
+        return results
+
+    def benchmark_motion_engines(self, image_path, duration=5.0, effects=("zoom", "slide", "fade", "pan")):
+        """Render each effect with the ffmpeg filters and the numpy engine and compare the timings"""
+        results = {}
+        for effect_type in effects:
+            results[effect_type] = self._benchmark_segment(
+                image_path, duration, effect_type, 'motion_engine', ("ffmpeg", "numpy")
+            )
+            ffmpeg_seconds = results[effect_type]['ffmpeg']
+            numpy_seconds = results[effect_type]['numpy']
+            print(f"{effect_type:>5}: ffmpeg {ffmpeg_seconds:.2f}s, numpy {numpy_seconds:.2f}s "
+                  f"({ffmpeg_seconds / numpy_seconds:.2f}x)")
+        return results
+
+    def plan_timeline(self, image_dir, voice_dir, video_mode = False, channel: str = None):
+        """
+        Work out which images, durations and effects belong to each voice script.
 
-    def create_final_video(self, image_dir, voice_dir,output_path , video_mode = False, channel: str = None):
-        """Create final video with all segments"""
-        # Validate and get files maintaining folder order
+        Returns a list with one entry per voice script:
+            {'voice_path', 'voice_duration', 'images': [{'index', 'path', 'duration', 'effect'}]}
+        """
         image_files, voice_files = self.validate_files(image_dir, voice_dir,video_mode = video_mode, channel = channel)
-        segments = []
-        
-        # Process each voice script with its two corresponding images
+        images_per_voice, effects = scene_layout(channel, video_mode)
+
+        # Probe every voice clip in one batch, get_audio_duration then hits the cache
+        media_probe.probe_many([os.path.join(voice_dir, f) for f in voice_files])
+
+        timeline = []
         for voice_idx, voice_file in enumerate(voice_files):
-            print(f"Processing voice script {voice_idx + 1}/{len(voice_files)}")
-            
             voice_path = os.path.join(voice_dir, voice_file)
             voice_duration = self.get_audio_duration(voice_path)
-            image_duration = voice_duration / 2
-            
-            if channel == "motivation":
-                if video_mode:
-                    # For video mode: 3 images per voice
-                    image_duration = voice_duration / 3
-                    image_segments = []
-                    for j in range(3):
-                        img_idx = voice_idx * 3 + j
-                        image_path = os.path.join(image_dir, image_files[img_idx])
-                        temp_segment = os.path.join(self.temp_dir, f'temp_segment_{img_idx}.mp4')
-                        
-                        # Alternate between zoom and pan effects
-                        effect_type = "zoom" if j % 2 == 0 else "fade"
-                        self.create_video_segment(image_path, image_duration, temp_segment, effect_type)
-                        image_segments.append(temp_segment)
-                        
-                else:
-                    # For non-video mode: 5 images per voice
-                    image_duration = voice_duration / 5
-                    image_segments = []
-                    for j in range(5):
-                        img_idx = voice_idx * 5 + j
-                        image_path = os.path.join(image_dir, image_files[img_idx])
-                        temp_segment = os.path.join(self.temp_dir, f'temp_segment_{img_idx}.mp4')
-                        
-                        # Alternate between zoom and pan effects
-                        effect_type = "fade" if j % 2 == 0 else "zoom"
-                        self.create_video_segment(image_path, image_duration, temp_segment, effect_type)
-                        image_segments.append(temp_segment)
-            else:        
-                img1_idx = voice_idx * 2
-                img2_idx = voice_idx * 2 + 1
-                
-                # Create segments for both images
-                image_segments = []
-                for i, img_idx in enumerate([img1_idx, img2_idx]):
-                    image_path = os.path.join(image_dir, image_files[img_idx])
-                    temp_segment = os.path.join(self.temp_dir, f'temp_segment_{img_idx}.mp4')
-                    
-                    # Alternate between zoom and pan effects
-                    effect_type = "fade" if i % 2 == 0 else "zoom"
-                    self.create_video_segment(image_path, image_duration, temp_segment, effect_type)
-                    image_segments.append(temp_segment)
-                
-            # Concatenate two image segments
-            segment_list = os.path.join(self.temp_dir, f'segment_list_{voice_idx}.txt')
-            with open(segment_list, 'w') as f:
-                for seg in image_segments:
-                    f.write(f"file '{seg}'\n")
-            
-            segment_video = os.path.join(self.temp_dir, f'segment_{voice_idx}.mp4')
-            subprocess.run([
-                'ffmpeg', '-y',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', segment_list,
-                '-c', 'copy',
-                segment_video
-            ], check=True)
+            image_duration = voice_duration / images_per_voice
+
+            images = []
+            for j in range(images_per_voice):
+                img_idx = voice_idx * images_per_voice + j
+                images.append({
+                    'index': img_idx,
+                    'path': os.path.join(image_dir, image_files[img_idx]),
+                    'duration': image_duration,
+                    # Alternate between the two effects of this layout
+                    'effect': effects[j % 2]
+                })
+
+            timeline.append({
+                'voice_path': voice_path,
+                'voice_duration': voice_duration,
+                'images': images
+            })
+        return timeline
+
+    def create_final_video(self, image_dir, voice_dir,output_path , video_mode = False, channel: str = None,
+                           manifest_path: str = None):
+        """
+        Create final video with all segments.
+
+        With a scene manifest (see utils.scenemanifest) the scene order, images and
+        effects come from the manifest instead of the folders' creation times, and
+        the scenes are diffed against the manifest of the previous render. Only a
+        per-scene render with a scene cache turns that into fewer scenes rebuilt.
+        """
+        if manifest_path:
+            manifest = refresh_scene_manifest(load_scene_manifest(manifest_path))
+            timeline = manifest['scenes']
+            rendered_path = os.path.splitext(manifest_path)[0] + ".rendered.json"
+            if os.path.exists(rendered_path):
+                changed = diff_scene_manifests(load_scene_manifest(rendered_path), manifest)
+                print(f"{len(changed)}/{len(timeline)} scenes changed since the last render: {changed}")
+                if not self.scene_cache or self.render_mode == "filtergraph":
+                    print(f"Re-rendering all {len(timeline)} scenes: unchanged scenes are only reused "
+                          f"from a scene cache in segments or parallel mode")
+        else:
+            # Validate and get files maintaining folder order
+            timeline = self.plan_timeline(image_dir, voice_dir, video_mode=video_mode, channel=channel)
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        if self.render_mode == "filtergraph":
+            self.render_single_pass(timeline, output_path)
+        else:
+            self.render_segments(timeline, output_path)
+
+        if manifest_path:
+            save_scene_manifest(manifest, rendered_path)
+        self.last_clip_offsets = self.clip_offsets(timeline)
+
+        # Cleanup temporary directory
+        shutil.rmtree(self.temp_dir)
+        print("Video creation completed!")
+
+    def clip_offsets(self, timeline, single_pass=None):
+        """Start time of every voice clip in the rendered video, in seconds"""
+        if single_pass is None:
+            single_pass = self.render_mode == "filtergraph"
+        # Each gap is one black frame: at the output rate in the single pass graph,
+        # at ffmpeg's default 25 fps when rendered by create_gap
+        gap = 1 / self.fps if single_pass else 1 / 25
+        offsets = []
+        start = 0.0
+        for scene in timeline:
+            offsets.append(start)
+            start += scene['voice_duration'] + gap
+        return offsets
+
+    def scene_key(self, scene):
+        """Cache key of a rendered scene: its content plus every setting that changes the encode"""
+        parts = [scene.get('voice_hash') or file_hash(scene['voice_path'])]
+        for image in scene['images']:
+            parts += [
+                image.get('hash') or file_hash(image['path']),
+                self.tier_effect(image['effect']),
+                f"{image['duration']:.6f}"
+            ]
+        parts += [f"{self.width}x{self.height}", self.motion_engine, *self.encoder_args()]
+        return FileCache.make_key(*parts)
+
+    def render_scene(self, scene, voice_idx):
+        """Render one voice script: its image segments, their concat and the narration mux"""
+        image_segments = []
+        segment_timings = []
+        for image in scene['images']:
+            temp_segment = os.path.join(self.temp_dir, f"temp_segment_{image['index']}.mp4")
+            segment_timings.append(
+                self.create_video_segment(image['path'], image['duration'], temp_segment, image['effect'])
+            )
+            image_segments.append(temp_segment)
             
-            # Add audio to segment
+        # Concatenate the image segments
+        segment_list = os.path.join(self.temp_dir, f'segment_list_{voice_idx}.txt')
+        with open(segment_list, 'w') as f:
+            for seg in image_segments:
+                f.write(f"file '{seg}'\n")
+        
+        segment_video = os.path.join(self.temp_dir, f'segment_{voice_idx}.mp4')
+        subprocess.run([
+            'ffmpeg', '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', segment_list,
+            '-c', 'copy',
+            segment_video
+        ], check=True)
+        
+        # Add audio to segment
+        final_segment = os.path.join(self.temp_dir, f'final_segment_{voice_idx}.mp4')
+        subprocess.run([
+            'ffmpeg', '-y',
+            '-i', segment_video,
+            '-i', scene['voice_path'],
+            '-c:v', 'copy',
+            '-c:a', 'aac',
+            '-shortest',
+            final_segment
+        ], check=True)
+        return final_segment, segment_timings
+
+    def render_segments(self, timeline, output_path):
+        """Render every scene to its own segment, then concatenate them with gaps in timeline order"""
+        start_time = time.perf_counter()
+
+        # Unchanged scenes come straight out of the scene cache
+        results = [None] * len(timeline)
+        pending = []
+        for voice_idx, scene in enumerate(timeline):
+            scene_key = self.scene_key(scene) if self.scene_cache else None
             final_segment = os.path.join(self.temp_dir, f'final_segment_{voice_idx}.mp4')
-            subprocess.run([
-                'ffmpeg', '-y',
-                '-i', segment_video,
-                '-i', voice_path,
-                '-c:v', 'copy',
-                '-c:a', 'aac',
-                '-shortest',
-                final_segment
-            ], check=True)
-            
-            segments.append(final_segment)
-            
+            if scene_key and self.scene_cache.fetch(scene_key, final_segment):
+                results[voice_idx] = {
+                    'path': final_segment,
+                    'elapsed': 0.0,
+                    'segment_timings': [],
+                    'cache_hits': 0,
+                    'cache_misses': 0
+                }
+            else:
+                pending.append((voice_idx, scene, scene_key))
+        if self.scene_cache:
+            print(f"Reusing {len(timeline) - len(pending)} unchanged scenes, rendering {len(pending)}")
+
+        if self.render_mode == "parallel" and len(pending) > 1:
+            workers = min(self.workers, len(pending))
+            print(f"Rendering {len(pending)} voice scripts on {workers} workers "
+                  f"({self.x264_threads} x264 threads each)...")
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = list(pool.map(
+                    _render_scene_timed,
+                    [self] * len(pending),
+                    [scene for _, scene, _ in pending],
+                    [voice_idx for voice_idx, _, _ in pending]
+                ))
+        else:
+            rendered = []
+            for voice_idx, scene, _ in pending:
+                print(f"Processing voice script {voice_idx + 1}/{len(timeline)}")
+                rendered.append(_render_scene_timed(self, scene, voice_idx))
+                print(f"Completed voice script {voice_idx + 1}/{len(timeline)}")
+
+        for (voice_idx, _, scene_key), result in zip(pending, rendered):
+            if scene_key:
+                self.scene_cache.store(scene_key, result['path'])
+            results[voice_idx] = result
+
+        # Every gap is identical, so render it once and reuse it between scenes
+        gap_path = None
+        if len(timeline) > 1:
+            gap_path = os.path.join(self.temp_dir, 'gap.mp4')
+            self.create_gap(gap_path)
+
+        segments = []
+        for voice_idx, result in enumerate(results):
+            segments.append(result['path'])
             # Add gap after each segment except the last one
-            if voice_idx < len(voice_files) - 1:
-                gap_path = os.path.join(self.temp_dir, f'gap_{voice_idx}.mp4')
-                self.create_gap(gap_path)
+            if voice_idx < len(timeline) - 1:
                 segments.append(gap_path)
-            
-            print(f"Completed voice script {voice_idx + 1}/{len(voice_files)}")
         
         # Create final concat file
         final_concat = os.path.join(self.temp_dir, 'final_concat.txt')
@@ -222,10 +601,253 @@ class VideoEditor:
             '-c', 'copy',
             output_path
         ], check=True)
-        
+
+        # Summed scene times over wall time. In parallel mode the scenes competed for the
+        # CPU with capped x264 threads, so this is not a speedup over the segments mode;
+        # benchmark_render_modes times that baseline for real.
+        wall_seconds = time.perf_counter() - start_time
+        scene_seconds = sum(result['elapsed'] for result in results)
+        encoded = [timing for result in results for timing in result['segment_timings'] if not timing['cached']]
+        self.last_render_stats = {
+            'render_mode': self.render_mode,
+            'frame_feed': self.frame_feed,
+            'wall_seconds': wall_seconds,
+            'scene_seconds': scene_seconds,
+            'scene_time_ratio': scene_seconds / wall_seconds if wall_seconds else 1.0,
+            'avg_prepare_seconds': sum(t['prepare_seconds'] for t in encoded) / len(encoded) if encoded else 0.0,
+            'avg_encode_seconds': sum(t['encode_seconds'] for t in encoded) / len(encoded) if encoded else 0.0
+        }
+        if encoded:
+            print(f"{self.frame_feed} frame feed: {self.last_render_stats['avg_prepare_seconds']:.2f}s prepare, "
+                  f"{self.last_render_stats['avg_encode_seconds']:.2f}s encode per image")
+        if self.render_mode == "parallel":
+            print(f"Rendered scenes in {wall_seconds:.1f}s wall time, {scene_seconds:.1f}s summed over "
+                  f"the scenes ({self.last_render_stats['scene_time_ratio']:.2f}x overlap)")
+
+        if self.segment_cache:
+            if self.render_mode == "parallel":
+                # Workers counted on their own copies of the cache
+                for result in rendered:
+                    self.segment_cache.hits += result['cache_hits']
+                    self.segment_cache.misses += result['cache_misses']
+            self.last_render_stats['segment_cache'] = self.segment_cache.stats()
+            print(f"Segment cache: {self.segment_cache.hits} hits, {self.segment_cache.misses} misses")
+        if self.scene_cache:
+            self.last_render_stats['scene_cache'] = self.scene_cache.stats()
+
+    def smart_crop_box(self, image_path, target_width, target_height):
+        """
+        Pick the largest crop of an image with the target aspect ratio, slid along its
+        free axis to where the image has the most edge detail (ties go to the center).
+
+        Returns:
+            (x, y, width, height) in source pixels
+        """
+        with Image.open(image_path) as img:
+            source_width, source_height = img.size
+            target_ratio = target_width / target_height
+            if source_width / source_height > target_ratio:
+                crop_width, crop_height = int(source_height * target_ratio) // 2 * 2, source_height
+            else:
+                crop_width, crop_height = source_width, int(source_width / target_ratio) // 2 * 2
+
+            # Measure detail on a small grayscale copy
+            scale = min(1.0, 256 / max(source_width, source_height))
+            small = img.convert('L').resize((max(1, int(source_width * scale)), max(1, int(source_height * scale))))
+            edges = np.asarray(small.filter(ImageFilter.FIND_EDGES), dtype=np.float64)
+
+        if crop_width < source_width:
+            profile, window, free = edges.sum(axis=0), crop_width * scale, source_width - crop_width
+        elif crop_height < source_height:
+            profile, window, free = edges.sum(axis=1), crop_height * scale, source_height - crop_height
+        else:
+            return 0, 0, crop_width, crop_height
+
+        window = max(1, min(len(profile), int(round(window))))
+        cumulative = np.concatenate(([0.0], np.cumsum(profile)))
+        sums = cumulative[window:] - cumulative[:-window]
+        positions = np.arange(len(sums))
+        center = (len(sums) - 1) / 2
+        # A slight pull towards the center keeps flat images centered
+        scores = sums - 0.05 * sums.max() * np.abs(positions - center) / max(center, 1)
+        offset = min(free, int(np.argmax(scores) / scale))
+
+        if crop_width < source_width:
+            return offset, 0, crop_width, crop_height
+        return 0, offset, crop_width, crop_height
+
+    def build_single_pass_graph(self, timeline, renditions=None):
+        """
+        Build the inputs and filter_complex that render the whole timeline at once.
+
+        Every image is letterboxed and animated in the graph, images of one voice
+        script are followed by its narration, and scripts are separated by the same
+        short black gap that create_gap renders. The result is a single [outv]/[outa] pair.
+
+        With renditions, a list of (name, width, height), every image is decoded once
+        and split into one smart-cropped branch per rendition instead, giving an
+        [outv_<name>]/[outa_<name>] pair for each.
+
+        Returns:
+            (input_args, filter_complex)
+        """
+        multi = renditions is not None
+        if not multi:
+            renditions = [(None, self.width, self.height)]
+        count = len(renditions)
+        suffixes = [f"_{r}" if multi else "" for r in range(count)]
+
+        input_args = []
+        filters = []
+        concat_inputs = [[] for _ in renditions]
+        input_idx = 0
+
+        for voice_idx, scene in enumerate(timeline):
+            image_labels = [[] for _ in renditions]
+            for image in scene['images']:
+                duration = image['duration']
+                effect_type = self.tier_effect(image['effect'])
+                if effect_type == "zoom":
+                    # zoompan emits d frames per input frame, so feed the still exactly once
+                    input_args += ['-framerate', str(self.fps), '-i', image['path']]
+                else:
+                    input_args += ['-loop', '1', '-framerate', str(self.fps), '-t', f"{duration:.3f}", '-i', image['path']]
+
+                if multi:
+                    # Decode the source once and fan it out to every rendition
+                    sources = [f"[i{image['index']}_{r}]" for r in range(count)]
+                    filters.append(f"[{input_idx}:v]split={count}{''.join(sources)}")
+                else:
+                    sources = [f"[{input_idx}:v]"]
+
+                for r, (_, width, height) in enumerate(renditions):
+                    if multi:
+                        x, y, crop_width, crop_height = self.smart_crop_box(image['path'], width, height)
+                        fit = f"crop={crop_width}:{crop_height}:{x}:{y},scale={width}:{height},setsar=1,"
+                    else:
+                        fit = (
+                            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1,"
+                        )
+                    label = f"v{image['index']}{suffixes[r]}"
+                    filters.append(
+                        f"{sources[r]}{fit}"
+                        f"{self.effect_filter(effect_type, duration, zoom_fps=self.fps, size=(width, height))},"
+                        f"fps={self.fps},trim=duration={duration:.3f},setpts=PTS-STARTPTS,"
+                        f"format=yuv420p[{label}]"
+                    )
+                    image_labels[r].append(f"[{label}]")
+                input_idx += 1
+
+            input_args += ['-i', scene['voice_path']]
+            voice_labels = ''.join(f"[sa{voice_idx}{suffix}]" for suffix in suffixes)
+            filters.append(
+                f"[{input_idx}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,"
+                f"asetpts=PTS-STARTPTS" + (f",asplit={count}" if multi else "") + voice_labels
+            )
+            input_idx += 1
+
+            for r, (_, width, height) in enumerate(renditions):
+                suffix = suffixes[r]
+                filters.append(
+                    f"{''.join(image_labels[r])}concat=n={len(image_labels[r])}:v=1:a=0[sv{voice_idx}{suffix}]"
+                )
+                concat_inputs[r].append(f"[sv{voice_idx}{suffix}][sa{voice_idx}{suffix}]")
+
+                # Add gap after each segment except the last one
+                if voice_idx < len(timeline) - 1:
+                    filters.append(
+                        f"color=c=black:s={width}x{height}:r={self.fps}:d=0.01,"
+                        f"setsar=1,format=yuv420p[gv{voice_idx}{suffix}]"
+                    )
+                    filters.append(
+                        f"anullsrc=r=44100:cl=stereo,atrim=duration=0.01,"
+                        f"aformat=sample_fmts=fltp:channel_layouts=stereo[ga{voice_idx}{suffix}]"
+                    )
+                    concat_inputs[r].append(f"[gv{voice_idx}{suffix}][ga{voice_idx}{suffix}]")
+
+        for r, (name, _, _) in enumerate(renditions):
+            outputs = f"[outv_{name}][outa_{name}]" if multi else "[outv][outa]"
+            filters.append(f"{''.join(concat_inputs[r])}concat=n={len(concat_inputs[r])}:v=1:a=1{outputs}")
+        return input_args, ";\n".join(filters)
+
+    def render_single_pass(self, timeline, output_path):
+        """Render the whole timeline with one ffmpeg process and a single H.264 encode"""
+        input_args, filter_complex = self.build_single_pass_graph(timeline)
+
+        # The graph grows with the number of images, keep it off the command line
+        filter_script = os.path.join(self.temp_dir, 'timeline_filter.txt')
+        with open(filter_script, 'w') as f:
+            f.write(filter_complex)
+
+        print(f"Rendering {sum(len(scene['images']) for scene in timeline)} images in a single pass...")
+        subprocess.run([
+            'ffmpeg', '-y',
+            *input_args,
+            '-filter_complex_script', filter_script,
+            '-map', '[outv]',
+            '-map', '[outa]',
+            *self.encoder_args(),
+            '-r', str(self.fps),
+            '-c:a', 'aac',
+            output_path
+        ], check=True)
+
+    def create_renditions(self, image_dir, voice_dir, outputs, video_mode = False, channel: str = None,
+                          manifest_path: str = None):
+        """
+        Render several aspect ratios of the same video from one set of assets in one ffmpeg pass.
+
+        Args:
+            outputs: Rendition name -> output path, names from RENDITION_SIZES
+                (e.g. {"shorts": "output/youtube_shorts.mp4", "video": "output/youtube_video.mp4"}).
+            video_mode, channel: Layout the assets were generated for (images per voice script).
+            manifest_path: Optional scene manifest to take the scenes from.
+        """
+        if manifest_path:
+            timeline = refresh_scene_manifest(load_scene_manifest(manifest_path))['scenes']
+        else:
+            timeline = self.plan_timeline(image_dir, voice_dir, video_mode=video_mode, channel=channel)
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        renditions = []
+        for name in outputs:
+            width, height = self.RENDITION_SIZES[name]
+            if self.tier == "draft":
+                width = int(width * self.draft_scale) // 2 * 2
+                height = int(height * self.draft_scale) // 2 * 2
+            renditions.append((name, width, height))
+        input_args, filter_complex = self.build_single_pass_graph(timeline, renditions=renditions)
+
+        filter_script = os.path.join(self.temp_dir, 'renditions_filter.txt')
+        with open(filter_script, 'w') as f:
+            f.write(filter_complex)
+
+        output_args = []
+        for name, output_path in outputs.items():
+            output_args += [
+                '-map', f'[outv_{name}]',
+                '-map', f'[outa_{name}]',
+                *self.encoder_args(),
+                '-r', str(self.fps),
+                '-c:a', 'aac',
+                output_path
+            ]
+
+        print(f"Rendering {', '.join(outputs)} renditions in a single pass...")
+        subprocess.run([
+            'ffmpeg', '-y',
+            *input_args,
+            '-filter_complex_script', filter_script,
+            *output_args
+        ], check=True)
+
+        self.last_clip_offsets = self.clip_offsets(timeline, single_pass=True)
+
         # Cleanup temporary directory
         shutil.rmtree(self.temp_dir)
-        print("Video creation completed!")
+        print("Rendition creation completed!")
+        return outputs
 
     def create_gap(self, output_path):
         """Create a short (20-millisecond) black gap"""
@@ -233,13 +855,28 @@ class VideoEditor:
             'ffmpeg', '-y',
             '-f', 'lavfi',
             '-i', f'color=c=black:s={self.width}x{self.height}:d=0.01',
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-pix_fmt', 'yuv420p',
+            *self.encoder_args(),
             output_path
         ]
         subprocess.run(cmd, check=True)
 
+def _render_scene_timed(editor, scene, voice_idx):
+    """Process pool entry point: render one scene and report its timings and segment cache lookups"""
+    cache = editor.segment_cache
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    start_time = time.perf_counter()
+    final_segment, segment_timings = editor.render_scene(scene, voice_idx)
+    elapsed = time.perf_counter() - start_time
+    if cache:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return {
+        'path': final_segment,
+        'elapsed': elapsed,
+        'segment_timings': segment_timings,
+        'cache_hits': hits,
+        'cache_misses': misses
+    }
+
 def main():
     try:
         editor = VideoEditor(video_mode=False)
@@ -0,0 +1,80 @@
+import os
+import subprocess
+from typing import List, Optional
+from Agents.bgMusicAgent import VideoMusicSynchronizer
+from Agents.captionAgent import (caption_stage, remove_caption_sprites, write_captions, write_script_captions,
+                                  write_clip_captions)
+from utils.mediaprobe import media_probe
+
+def finish_video(video_path: str,
+                 music_synchronizer: VideoMusicSynchronizer,
+                 include_caption: bool = False,
+                 srt_path: str = "output.srt",
+                 output_path: Optional[str] = None,
+                 video_mode: bool = False,
+                 script_clips: Optional[List[dict]] = None,
+                 voice_clips: Optional[List[dict]] = None,
+                 compositor: str = "libass") -> str:
+    """
+    Burn in captions, mix background music and normalize loudness in one ffmpeg pass.
+
+    Running transcribe_and_caption and then sync_music_to_video encodes the video
+    twice and the audio twice. Here the caption graph and the music mix share one
+    filter_complex, so the video is encoded once (or stream-copied without
+    captions) and the audio is encoded once. With script_clips the captions are
+    timed from the known scripts instead of transcribed, and with voice_clips the
+    clips are transcribed in parallel instead of the video. compositor selects how the
+    captions are drawn (see caption_stage).
+    If the captions can't be generated, the video is finished without them.
+    Returns the path to the finished video, or video_path if ffmpeg fails.
+    """
+    if output_path is None:
+        output_path = os.path.join("output", "youtube_with_music.mp4")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    video_duration = media_probe.duration(video_path)
+    caption_inputs = []
+    filters = [music_synchronizer.music_mix_filter(voice="[0:a]", music="[1:a]", output_label="[aout]")]
+    video_args = ['-map', '0:v', '-c:v', 'copy']
+    if include_caption:
+        try:
+            if script_clips:
+                write_script_captions(script_clips, srt_path)
+            elif voice_clips:
+                write_clip_captions(voice_clips, srt_path)
+            else:
+                write_captions(video_path, srt_path)
+            width, height = media_probe.dimensions(video_path)
+            caption_inputs, caption_filter = caption_stage(srt_path, width, height, video_mode, compositor,
+                                                           sprite_input=2, output_label="[vout]")
+            filters.append(caption_filter)
+            video_args = ['-map', '[vout]', '-c:v', 'libx264', '-preset', 'fast', '-crf', '23']
+        except Exception as e:
+            # Still mix the music and normalize loudness, just without captions
+            print(f"Error generating captions, finishing without them: {e}")
+
+    try:
+        print("Finishing video (captions, music and loudness in one pass)...")
+        subprocess.run([
+            'ffmpeg', '-y',
+            '-i', video_path,
+            '-i', music_synchronizer.music_path,
+            *caption_inputs,
+            '-filter_complex', '; '.join(filters),
+            *video_args,
+            '-map', '[aout]',
+            '-c:a', 'aac',
+            '-b:a', '192k',
+            '-shortest',
+            output_path
+        ], check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error finishing video: {e}")
+        return video_path
+    finally:
+        remove_caption_sprites(caption_inputs)
+
+    # Update cache with new music start point
+    music_synchronizer.record_playback(video_path, video_duration)
+    print(f"Finished video saved as {output_path}")
+    return output_path
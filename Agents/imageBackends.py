@@ -0,0 +1,254 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+from PIL import Image, ImageDraw, ImageOps
+from utils.imagetransport import ImageTransport
+from utils.modelregistry import model_registry
+
+
+class RateLimitedError(Exception):
+    """Raised by a backend when the service answered 429 Too Many Requests"""
+    status_code = 429
+
+
+class ImageBackend:
+    """
+    Text-to-image backend used by ImageGenerator.
+
+    generate() is called from several threads at once, each with the API key the
+    request was dispatched on, and must write a width x height PNG to output_path.
+    """
+    name = "base"
+    # Whether the backend needs real API keys; local backends make up their own
+    requires_keys = True
+    # Backends that render prompts in batches locally instead of per-key requests
+    batch_size = None
+
+    def generate(self, key: str, prompt: str, width: int, height: int, output_path: str) -> Tuple[int, int]:
+        """Write the image to output_path and return the size the backend produced"""
+        raise NotImplementedError
+
+    def default_keys(self) -> List[str]:
+        """Keys to dispatch on when no API keys are configured"""
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+class HuggingFaceBackend(ImageBackend):
+    name = "huggingface"
+
+    def __init__(self, model: str):
+        """Hugging Face inference API over pooled per-key sessions"""
+        self.transport = ImageTransport(model)
+
+    def generate(self, key, prompt, width, height, output_path):
+        return self.transport.text_to_image(key, prompt, width, height, output_path)
+
+    def close(self):
+        self.transport.close()
+
+
+class ProceduralBackend(ImageBackend):
+    name = "procedural"
+    requires_keys = False
+
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, rate_limit_probability: float = 0.0,
+                 requests_per_minute: int = None, num_keys: int = 2, seed: int = 0):
+        """
+        Offline backend that draws a deterministic image from the prompt hash.
+
+        The same prompt always gives the same image, at any size. Latency and rate
+        limits can be simulated, so the pipeline's throughput and 429 handling can be
+        profiled without Hugging Face keys.
+
+        Args:
+            latency: Seconds every request takes.
+            latency_jitter: Extra random latency of up to this many seconds.
+            rate_limit_probability: Chance that a request fails with a 429.
+            requests_per_minute: Per-key quota; requests over it fail with a 429.
+            num_keys: Number of simulated keys returned by default_keys().
+            seed: Seed of the latency and 429 draws, so load tests are repeatable.
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit_probability = rate_limit_probability
+        self.requests_per_minute = requests_per_minute
+        self.num_keys = num_keys
+        self._random = random.Random(seed)
+        self._requests: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def default_keys(self):
+        return [f"local-key-{key_idx}" for key_idx in range(1, self.num_keys + 1)]
+
+    def _simulate_service(self, key: str) -> None:
+        with self._lock:
+            delay = self.latency + self._random.random() * self.latency_jitter
+            rate_limited = self._random.random() < self.rate_limit_probability
+            if self.requests_per_minute is not None:
+                now = time.monotonic()
+                window = self._requests.setdefault(key, deque())
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= self.requests_per_minute:
+                    rate_limited = True
+                else:
+                    window.append(now)
+        time.sleep(delay)
+        if rate_limited:
+            raise RateLimitedError(f"429 Too Many Requests for key {key}")
+
+    @staticmethod
+    def render(prompt: str, width: int, height: int) -> Image.Image:
+        """Deterministic image for a prompt: a two-color gradient with a few shapes"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        top, bottom = digest[0:3], digest[3:6]
+        image = Image.new("RGB", (width, height))
+        draw = ImageDraw.Draw(image)
+        for y in range(height):
+            t = y / max(1, height - 1)
+            draw.line([(0, y), (width, y)], fill=tuple(int(a + (b - a) * t) for a, b in zip(top, bottom)))
+        for shape_idx in range(4):
+            chunk = digest[6 + shape_idx * 6:12 + shape_idx * 6]
+            x, y = chunk[0] / 255 * width, chunk[1] / 255 * height
+            radius = (0.05 + chunk[2] / 255 * 0.2) * min(width, height)
+            box = [x - radius, y - radius, x + radius, y + radius]
+            if shape_idx % 2:
+                draw.rectangle(box, fill=tuple(chunk[3:6]))
+            else:
+                draw.ellipse(box, fill=tuple(chunk[3:6]))
+        return image
+
+    def generate(self, key, prompt, width, height, output_path):
+        self._simulate_service(key)
+        self.render(prompt, width, height).save(output_path, format="PNG")
+        return width, height
+
+
+EXPORT_CACHE_DIR = os.path.join(".cache", "onnx_diffusion")
+
+
+class OnnxDiffusionBackend(ImageBackend):
+    name = "onnx"
+    requires_keys = False
+
+    def __init__(self, model: str = "stabilityai/sd-turbo", batch_size: int = 2, threads: int = None,
+                 num_inference_steps: int = 1, guidance_scale: float = 0.0, long_side: int = 512):
+        """
+        Local text-to-image on CPU with a distilled Stable Diffusion model in ONNX Runtime.
+
+        The model is exported to ONNX once (kept under .cache/onnx_diffusion), and the
+        ORT pipeline is loaded once and kept in the model registry, so
+        its inference sessions persist across jobs. Prompts are rendered in batches at
+        the model's native scale (long_side pixels on the long edge, target aspect),
+        then scaled and center-cropped to the target size. There are no API rate limits.
+
+        Args:
+            model: Diffusers or ONNX model id. sd-turbo needs a single step without guidance.
+            batch_size: Prompts per pipeline call.
+            threads: ONNX Runtime intra-op threads. Defaults to the CPU count.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.threads = threads or os.cpu_count() or 1
+        self.num_inference_steps = num_inference_steps
+        self.guidance_scale = guidance_scale
+        self.long_side = long_side
+        self.export_dir = os.path.join(EXPORT_CACHE_DIR, model.replace("/", "--"))
+
+    def default_keys(self):
+        return ["local-onnx"]
+
+    def _load_pipeline(self):
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTStableDiffusionPipeline
+        except ImportError as e:
+            raise ImportError("The onnx image backend needs optimum[onnxruntime]: "
+                              "pip install optimum[onnxruntime] diffusers") from e
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = self.threads
+        # The pipeline runs its models one after another, so parallelism between ops gains nothing
+        session_options.inter_op_num_threads = 1
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        print(f"Loading ONNX diffusion pipeline {self.model} with {self.threads} threads")
+        if os.path.exists(os.path.join(self.export_dir, "model_index.json")):
+            return ORTStableDiffusionPipeline.from_pretrained(
+                self.export_dir, provider="CPUExecutionProvider", session_options=session_options
+            )
+        # First use: export the PyTorch model to ONNX once and keep the export
+        pipeline = ORTStableDiffusionPipeline.from_pretrained(
+            self.model, export=True, provider="CPUExecutionProvider", session_options=session_options
+        )
+        pipeline.save_pretrained(self.export_dir)
+        return pipeline
+
+    def export_bytes(self) -> int:
+        """Size of the exported ONNX models, which ONNX Runtime holds in memory once loaded"""
+        total = 0
+        for root, _, files in os.walk(self.export_dir):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files if ".onnx" in name)
+        return total
+
+    @property
+    def pipeline(self):
+        # Not a torch module, so the registry can't measure it from its parameters
+        return model_registry.get(f"onnx/{self.model}/{self.threads}", "cpu", self._load_pipeline,
+                                  size=lambda _: self.export_bytes())
+
+    def render_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Size the model renders at: target aspect, long side at the model's scale, multiples of 8"""
+        scale = self.long_side / max(width, height)
+        return max(8, round(width * scale / 8) * 8), max(8, round(height * scale / 8) * 8)
+
+    def generate_batch(self, prompts: List[str], width: int, height: int, output_paths: List[str]) -> None:
+        """Render prompts in one pipeline call and save each to its output path at width x height"""
+        render_width, render_height = self.render_size(width, height)
+        images = self.pipeline(
+            prompt=prompts,
+            width=render_width,
+            height=render_height,
+            num_inference_steps=self.num_inference_steps,
+            guidance_scale=self.guidance_scale
+        ).images
+        for image, output_path in zip(images, output_paths):
+            ImageOps.fit(image, (width, height), Image.LANCZOS).save(output_path, format="PNG")
+
+    def generate(self, key, prompt, width, height, output_path):
+        self.generate_batch([prompt], width, height, [output_path])
+        return self.render_size(width, height)
+
+
+def create_image_backend(name: str = None, model: str = "stabilityai/stable-diffusion-xl-base-1.0") -> ImageBackend:
+    """
+    Backend by name: "huggingface" (default), "procedural" or "onnx". The name defaults
+    to the IMAGE_BACKEND environment variable. The procedural backend reads its simulated
+    service from IMAGE_BACKEND_LATENCY, IMAGE_BACKEND_JITTER, IMAGE_BACKEND_429_RATE
+    and IMAGE_BACKEND_RPM; the onnx backend reads ONNX_IMAGE_MODEL, ONNX_BATCH_SIZE
+    and ONNX_THREADS.
+    """
+    name = (name or os.getenv("IMAGE_BACKEND") or "huggingface").lower()
+    if name == "huggingface":
+        return HuggingFaceBackend(model)
+    if name == "procedural":
+        requests_per_minute = os.getenv("IMAGE_BACKEND_RPM")
+        return ProceduralBackend(
+            latency=float(os.getenv("IMAGE_BACKEND_LATENCY", 0)),
+            latency_jitter=float(os.getenv("IMAGE_BACKEND_JITTER", 0)),
+            rate_limit_probability=float(os.getenv("IMAGE_BACKEND_429_RATE", 0)),
+            requests_per_minute=int(requests_per_minute) if requests_per_minute else None
+        )
+    if name == "onnx":
+        threads = os.getenv("ONNX_THREADS")
+        return OnnxDiffusionBackend(
+            model=os.getenv("ONNX_IMAGE_MODEL", "stabilityai/sd-turbo"),
+            batch_size=int(os.getenv("ONNX_BATCH_SIZE", 2)),
+            threads=int(threads) if threads else None
+        )
+    raise ValueError(f"Unknown image backend: {name}")
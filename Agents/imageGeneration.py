@@ -1,92 +1,316 @@
+import heapq
+import itertools
 import os
 import time
-from queue import Queue
-from huggingface_hub import InferenceClient
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
+from Agents.imageBackends import ImageBackend, create_image_backend
+from utils.ratelimit import AimdLimiter, LatencyHistogram, TokenBucket, percentile
 
 load_dotenv()
 
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
 class ImageGenerator:
+    # Hugging Face allows about 3 image requests per minute per key
+    REQUESTS_PER_PERIOD = 3
+    RATE_PERIOD = 60
+    # One request at a time, spaced evenly: a larger burst would exceed the quota in a rolling minute
+    REQUEST_BURST = 1
+    RATE_LIMIT_PENALTY = 60
+
     def __init__(self, api_keys, model="stabilityai/stable-diffusion-xl-base-1.0", 
-                 width=576, height=1024, output_dir="assets/images", video_mode: bool = False):
-        self.api_keys = api_keys
+                 width=576, height=1024, output_dir="assets/images", video_mode: bool = False,
+                 multi_rendition: bool = False, hedge_percentile: float = 90, min_hedge_samples: int = 5,
+                 backend=None):
+        """
+        Images are generated concurrently across the API keys (see generate_all_images).
+        A request that is slower than the hedge_percentile latency of earlier requests
+        is duplicated on another idle key once min_hedge_samples latencies are known.
+        backend is an ImageBackend or a backend name (see create_image_backend);
+        by default the IMAGE_BACKEND environment variable picks it.
+        """
+        if not isinstance(backend, ImageBackend):
+            backend = create_image_backend(backend, model)
+        self.backend = backend
+        self.api_keys = [key for key in api_keys if key]
+        if not self.api_keys and not backend.requires_keys:
+            self.api_keys = backend.default_keys()
         self.model = model
-        if video_mode:
+        if multi_rendition:
+            # Square images leave room for both a 9:16 and a 16:9 crop of the same asset
+            self.width = 1024
+            self.height = 1024
+        elif video_mode:
             self.width = 1920  # YouTube video width
             self.height = 1080  # YouTube video height
         else:
             self.width = 1080  # YouTube Shorts width (portrait)
             self.height = 1920 # YouTube Shorts height
         self.output_dir = output_dir
-        self.key_usage = {key: {'count': 0, 'last_used': 0} for key in api_keys}
+        self.buckets = {key: TokenBucket(self.REQUESTS_PER_PERIOD, self.RATE_PERIOD, burst=self.REQUEST_BURST)
+                        for key in self.api_keys}
+        self.concurrency = AimdLimiter(initial=max(1, len(self.api_keys)),
+                                       maximum=max(1, len(self.api_keys)) * self.REQUESTS_PER_PERIOD)
+        self.latency_histograms = {key: LatencyHistogram() for key in self.api_keys}
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_samples = min_hedge_samples
+        self.hedges_sent = 0
+        self.hedges_won = 0
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def get_available_key(self):
-        """Finds a key that hasn't exceeded rate limits"""
-        now = time.time()
-        for key, usage in self.key_usage.items():
-            # Reset counter if more than 60 seconds have passed
-            if now - usage['last_used'] > 60:
-                usage['count'] = 0
-            if usage['count'] < 3:
+    def get_available_key(self, exclude=()):
+        """Takes a request token from the first key that has one, or returns None"""
+        now = time.monotonic()
+        for key, bucket in self.buckets.items():
+            if key not in exclude and bucket.try_acquire(now):
                 return key
         return None
 
+    def recent_latencies(self):
+        return [sample for histogram in self.latency_histograms.values() for sample in histogram.samples]
+
+    def hedge_threshold(self):
+        """Seconds after which a request gets a hedged duplicate, or None until enough latencies are known"""
+        latencies = self.recent_latencies()
+        if len(latencies) < self.min_hedge_samples:
+            return None
+        return percentile(latencies, self.hedge_percentile)
+
+    def latency_target(self):
+        """Latency above which the concurrency limit backs off: three times the median"""
+        latencies = self.recent_latencies()
+        if len(latencies) < self.min_hedge_samples:
+            return None
+        return 3 * percentile(latencies, 50)
+
+    def latency_report(self):
+        """Per-key latency histograms (keys shown by their last 4 characters) and hedging counters"""
+        return {
+            "keys": {f"...{key[-4:]}": histogram.stats() for key, histogram in self.latency_histograms.items()},
+            "concurrency_limit": self.concurrency.limit,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won
+        }
+
+    def next_key_time(self):
+        """monotonic() time at which some key will have a request token"""
+        return min(bucket.next_available() for bucket in self.buckets.values())
+
+    @staticmethod
+    def is_rate_limited(error):
+        response = getattr(error, "response", None)
+        return getattr(response, "status_code", None) == 429 or getattr(error, "status_code", None) == 429 \
+            or "TooManyRequests" in str(error) \
+            or "Too Many Requests" in str(error)
+
+    @staticmethod
+    def retry_delay(attempt):
+        """Exponential backoff for failures other than rate limits"""
+        return min(60, 5 * 2 ** attempt)
+
+    def output_path(self, idx):
+        return os.path.join(self.output_dir, f"image_{idx}.png")
+
+    def _generate_one(self, key, prompt, idx, output_path):
+        """Generate one image with the given key and save it to output_path. Raises on failure."""
+        print(f"Generating image {idx} using key ending with {key[-4:]}")
+        print(f"Prompt: {prompt}")
+        received_width, received_height = self.backend.generate(
+            key, prompt, self.width, self.height, output_path
+        )
+        print(f"Saved image {idx} ({received_width}x{received_height} received) to {output_path}")
+        return output_path
+
+    def _handle_failure(self, key, idx, attempt, error):
+        """Penalize the key on a 429 and return how long the prompt should wait before its retry"""
+        print(f"Error generating image {idx} (attempt {attempt + 1}): {str(error)}")
+        if self.is_rate_limited(error):
+            self.buckets[key].penalize(self.RATE_LIMIT_PENALTY)
+            self.concurrency.on_congestion()
+            # Another key may be free right away
+            return 0
+        return self.retry_delay(attempt)
+
     def generate_image_with_retry(self, prompt, idx, max_retries=5):
         """Generates an image with retry logic and rate limit management"""
         for retry in range(max_retries):
             key = self.get_available_key()
             if not key:
-                wait_time = 60 - (time.time() - min([v['last_used'] for v in self.key_usage.values()]))
+                wait_time = self.next_key_time() - time.monotonic()
                 print(f"All keys rate limited. Waiting {wait_time:.1f} seconds...")
-                time.sleep(max(wait_time, 10))
-                continue
-
-            client = InferenceClient(api_key=key)
+                time.sleep(max(wait_time, 0))
+                key = self.get_available_key()
+                if not key:
+                    continue
             try:
-                print(f"Generating image {idx} using key ending with {key[-4:]}")
-                print(f"Prompt: {prompt}")
-                
-                start_time = time.time()
-                image = client.text_to_image(
-                    prompt,
-                    model=self.model,
-                    width=self.width,
-                    height=self.height
-                )
-                
-                output_path = os.path.join(self.output_dir, f"image_{idx}.png")
-                image.save(output_path)
-                print(f"Saved image {idx} ({image.size[0]}x{image.size[1]}) to {output_path}")
-                
-                # Update key usage
-                self.key_usage[key]['count'] += 1
-                self.key_usage[key]['last_used'] = time.time()
+                self._generate_one(key, prompt, idx, self.output_path(idx))
                 return True
-
             except Exception as e:
-                print(f"Error generating image {idx} (attempt {retry+1}/{max_retries}): {str(e)}")
-                if "TooManyRequests" in str(e):
-                    self.key_usage[key]['count'] = 3  # Mark key as rate limited
-                    time.sleep(30)  # Wait longer after hitting rate limit
-                else:
-                    time.sleep(10)
+                time.sleep(self._handle_failure(key, idx, retry, e))
         
         print(f"Failed to generate image {idx} after {max_retries} attempts")
         return False
 
-    def generate_all_images(self, prompts):
-        """Process all prompts with proper rate limiting"""
-        queue = Queue()
-        for idx, prompt in enumerate(prompts, 1):
-            queue.put((idx, prompt))
-
-        while not queue.empty():
-            idx, prompt = queue.get()
-            success = self.generate_image_with_retry(prompt, idx)
-            if not success:
-                queue.put((idx, prompt))  # Re-add failed item to queue
-                time.sleep(60)  # Wait before retrying
+    def generate_all_images(self, prompts, max_attempts=8):
+        """
+        Generate all prompts concurrently across the API keys.
+
+        Each key has a token bucket, and a prompt is dispatched as soon as any key has a
+        token and the AIMD concurrency limit allows another request in flight. The
+        limit grows with fast successes and halves on 429s or slow responses. Failed
+        prompts go back on a pending heap with the time they may be retried, so a
+        backoff or a rate-limited key never holds up the other prompts.
+
+        A request running longer than the hedge threshold gets a duplicate on another
+        idle key. Requests write to temporary files; the first one to finish is moved
+        into place and its twin is abandoned, its file deleted once it finishes.
+        Returns {prompt index: image path}. Raises RuntimeError if some prompts still
+        fail after max_attempts.
+        """
+        if self.backend.batch_size:
+            return self._generate_batched(prompts)
+        if not self.api_keys:
+            raise ValueError(f"No API keys configured for the {self.backend.name} image backend")
+        # (not before, index, prompt, attempt)
+        pending = [(0.0, idx, prompt, 0) for idx, prompt in enumerate(prompts, 1)]
+        heapq.heapify(pending)
+        in_flight = {}  # future -> request dict
+        active = {}     # prompt index -> futures still running for it
+        hedged = set()
+        results = {}
+        failed = []
+        request_ids = itertools.count()
+        # Room for hedged duplicates and abandoned twins still finishing
+        pool = ThreadPoolExecutor(max_workers=2 * len(self.api_keys) * self.REQUESTS_PER_PERIOD)
+
+        def submit(key, idx, prompt, attempt, hedge=False):
+            temp_path = os.path.join(self.output_dir, f".image_{idx}_{next(request_ids)}.tmp.png")
+            future = pool.submit(self._generate_one, key, prompt, idx, temp_path)
+            in_flight[future] = {"key": key, "idx": idx, "prompt": prompt, "attempt": attempt,
+                                 "started": time.monotonic(), "temp_path": temp_path, "hedge": hedge}
+            active.setdefault(idx, set()).add(future)
+
+        def abandon(future):
+            """Stop waiting for a request and delete whatever it writes once it finishes"""
+            request = in_flight.pop(future)
+            active[request["idx"]].discard(future)
+            future.cancel()
+            future.add_done_callback(lambda _: _remove_file(request["temp_path"]))
+
+        try:
+            while pending or in_flight:
+                now = time.monotonic()
+                while pending and pending[0][0] <= now and len(in_flight) < self.concurrency.allowed():
+                    key = self.get_available_key()
+                    if key is None:
+                        break
+                    _, idx, prompt, attempt = heapq.heappop(pending)
+                    submit(key, idx, prompt, attempt)
+
+                # Hedge slow requests on a key that has nothing in flight
+                threshold = self.hedge_threshold()
+                wake_times = []
+                if threshold is not None:
+                    busy_keys = {request["key"] for request in in_flight.values()}
+                    for request in list(in_flight.values()):
+                        if request["idx"] in hedged:
+                            continue
+                        deadline = request["started"] + threshold
+                        if deadline > now:
+                            wake_times.append(deadline)
+                            continue
+                        key = self.get_available_key(exclude=busy_keys)
+                        if key is None:
+                            # Retry the hedge when an idle key gets a token
+                            idle = [bucket for k, bucket in self.buckets.items() if k not in busy_keys]
+                            if idle:
+                                wake_times.append(min(bucket.next_available() for bucket in idle))
+                            continue
+                        print(f"Image {request['idx']} is slower than {threshold:.1f}s, "
+                              f"hedging on key ending with {key[-4:]}")
+                        hedged.add(request["idx"])
+                        busy_keys.add(key)
+                        self.hedges_sent += 1
+                        submit(key, request["idx"], request["prompt"], request["attempt"], hedge=True)
+
+                # Sleep until a request finishes, a retry or hedge is due or a key gets a token.
+                # At the concurrency limit a free key doesn't help, so only a finished request can.
+                if pending and len(in_flight) < self.concurrency.allowed():
+                    wake_times.append(max(pending[0][0], self.next_key_time()))
+                timeout = max(0.0, min(wake_times) - time.monotonic()) if wake_times else None
+                if not in_flight:
+                    time.sleep(timeout or 0)
+                    continue
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future not in in_flight:
+                        continue  # Abandoned earlier in this batch: its twin already won
+                    request = in_flight.pop(future)
+                    idx = request["idx"]
+                    active[idx].discard(future)
+                    latency = time.monotonic() - request["started"]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        _remove_file(request["temp_path"])
+                        delay = self._handle_failure(request["key"], idx, request["attempt"], e)
+                        if active[idx]:
+                            continue  # The other copy of a hedged request is still running
+                        if request["attempt"] + 1 >= max_attempts:
+                            failed.append(idx)
+                        else:
+                            hedged.discard(idx)
+                            heapq.heappush(pending, (time.monotonic() + delay, idx, request["prompt"],
+                                                     request["attempt"] + 1))
+                        continue
+
+                    self.latency_histograms[request["key"]].record(latency)
+                    self.concurrency.on_success(latency, self.latency_target())
+                    os.replace(request["temp_path"], self.output_path(idx))
+                    results[idx] = self.output_path(idx)
+                    if request["hedge"]:
+                        self.hedges_won += 1
+                    # Take whichever copy finished first; the slow twin must not hold up the batch
+                    for twin in list(active[idx]):
+                        abandon(twin)
+        finally:
+            for future in list(in_flight):
+                abandon(future)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        report = self.latency_report()
+        print(f"Image requests: concurrency limit {report['concurrency_limit']:.1f}, "
+              f"{report['hedges_won']}/{report['hedges_sent']} hedges won")
+        for key_label, stats in report["keys"].items():
+            print(f"  key {key_label}: {stats['count']} requests, p50 {stats['p50'] or 0:.1f}s, "
+                  f"p90 {stats['p90'] or 0:.1f}s, {stats['buckets']}")
+        if failed:
+            raise RuntimeError(f"Failed to generate images {sorted(failed)} after {max_attempts} attempts")
+        return results
+
+    def _generate_batched(self, prompts):
+        """Render prompts locally in the backend's batches; no keys, rate limits or retries involved"""
+        results = {}
+        indexed = list(enumerate(prompts, 1))
+        for batch_start in range(0, len(indexed), self.backend.batch_size):
+            batch = indexed[batch_start:batch_start + self.backend.batch_size]
+            start_time = time.perf_counter()
+            self.backend.generate_batch([prompt for _, prompt in batch], self.width, self.height,
+                                        [self.output_path(idx) for idx, _ in batch])
+            elapsed = time.perf_counter() - start_time
+            for idx, _ in batch:
+                results[idx] = self.output_path(idx)
+            print(f"Generated images {batch[0][0]}-{batch[-1][0]} with {self.backend.name} "
+                  f"in {elapsed:.1f}s ({elapsed / len(batch):.1f}s per image)")
+        return results
 
 # if __name__ == "__main__":
 #     api_keys = [
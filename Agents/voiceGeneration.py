@@ -1,14 +1,30 @@
 import os
+import re
+import unicodedata
 from TTS.api import TTS
 import torch
 import gc
+import json
 import logging
-from typing import List, Dict, Optional
+import multiprocessing
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Iterator, List, Dict, Optional
 import torch
 from TTS.tts.configs.xtts_config import XttsConfig
 from TTS.tts.models.xtts import XttsAudioConfig, XttsArgs  # Added XttsArgs
 from TTS.config.shared_configs import BaseDatasetConfig
 from TTS.api import TTS
+from TTS import __version__ as TTS_VERSION
+from utils.filecache import FileCache
+from utils.mediaprobe import media_probe
+from utils.modelregistry import model_registry
+from utils.scenemanifest import file_hash
 # Allow all required configs to be unpickled safely
 torch.serialization.add_safe_globals([
     XttsConfig,
@@ -16,22 +32,139 @@ torch.serialization.add_safe_globals([
     BaseDatasetConfig,
     XttsArgs  # Added this to the safe globals
 ])
+
+LATENT_CACHE_DIR = os.path.join(".cache", "xtts_latents")
+# Conditioning latents already loaded in this process, by cache key
+_speaker_latents: Dict[str, tuple] = {}
+
+# Generator whose loaded model the forked TTS workers share, set by the parent right before forking
+_pool_generator = None
+
+def _init_tts_worker(threads):
+    # Pin intra-op threads so the workers together don't oversubscribe the cores
+    torch.set_num_threads(threads)
+
+def _generate_in_worker(args):
+    sentence, filename, split_sentences = args
+    return _pool_generator.generate_voice(sentence, filename, split_sentences=split_sentences, clear_memory=False)
+
+# Engine per tier: a fast single-speaker VITS voice for drafts, XTTS voice cloning for final renders
+TTS_ENGINES = {
+    "draft": "tts_models/en/vctk/vits",
+    "final": "tts_models/multilingual/multi-dataset/xtts_v2"
+}
+DRAFT_SPEAKER = "p267"
+
+QUANTIZED_CACHE_DIR = os.path.join(".cache", "xtts_int8")
+# XTTS submodules whose linear layers are quantized
+QUANTIZED_PARTS = ("gpt", "hifigan_decoder")
+
+def _conv1d_to_linear(module):
+    """
+    Swap the GPT-2 Conv1D layers (linear layers with a transposed weight) for nn.Linear,
+    so dynamic quantization picks up the attention and MLP projections too.
+    """
+    for name, child in module.named_children():
+        if type(child).__name__ == "Conv1D" and hasattr(child, "nf"):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight = torch.nn.Parameter(child.weight.detach().t().contiguous())
+            linear.bias = torch.nn.Parameter(child.bias.detach().clone())
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+def _quantized_cache_path(model_name):
+    key = FileCache.make_key(model_name, TTS_VERSION, torch.__version__, "qint8", QUANTIZED_PARTS, "module")
+    return os.path.join(QUANTIZED_CACHE_DIR, f"{key}.pt")
+
+def _load_quantized_tts(model_name):
+    """
+    Load a TTS model on CPU with int8 dynamic quantization of its GPT and decoder
+    linear layers. The whole quantized model is saved under .cache/xtts_int8; later
+    runs load it from there into an empty TTS wrapper, so the fp32 checkpoint is
+    never read and peak memory only holds the int8 model.
+    """
+    from TTS.utils.synthesizer import Synthesizer
+    cache_path = _quantized_cache_path(model_name)
+    if os.path.exists(cache_path):
+        # Our own cache file, which holds a whole pickled module rather than tensors only
+        model = torch.load(cache_path, map_location="cpu", weights_only=False)
+        synthesizer = Synthesizer(use_cuda=False)
+        synthesizer.tts_model = model
+        synthesizer.tts_config = model.config
+        synthesizer.output_sample_rate = model.config.audio["output_sample_rate"]
+        tts = TTS()
+        tts.model_name = model_name
+        tts.synthesizer = synthesizer
+        return tts
+
+    tts = TTS(model_name).to("cpu")
+    model = tts.synthesizer.tts_model
+    for part in QUANTIZED_PARTS:
+        if not hasattr(model, part):
+            continue
+        _conv1d_to_linear(getattr(model, part))
+        torch.ao.quantization.quantize_dynamic(
+            getattr(model, part), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    os.makedirs(QUANTIZED_CACHE_DIR, exist_ok=True)
+    temp_path = f"{cache_path}.part"
+    torch.save(model, temp_path)
+    os.replace(temp_path, cache_path)
+    return tts
+
+def _resident_mb():
+    """Current resident set size in MB, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        return None
+
 class VoiceGenerator:
     def __init__(self, 
                  channel = "ChronoShift_Chronicles",
                  output_folder: str = "assets/VoiceScripts",
                  device: str = "cuda" if torch.cuda.is_available() else "cpu",
-                 model_name: str = "tts_models/multilingual/multi-dataset/xtts_v2"):
+                 model_name: Optional[str] = None,
+                 cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 1024 ** 3,
+                 quantize: bool = False,
+                 tier: str = "final",
+                 draft_speaker: str = DRAFT_SPEAKER):
         """
         Initialize a voice generator using the VITS model.
         
         Args:
             output_folder: Directory to save generated voice files.
             device: Device to run the model on ('cuda' or 'cpu').
-            model_name: Name of the TTS model to use.
+            model_name: Name of the TTS model to use. Defaults to the engine of the tier.
+            cache_dir: Directory for caching synthesized WAVs by text, voice, language
+                and model, so repeated lines are not synthesized again. None disables it.
+            cache_max_bytes: Size cap of the audio cache.
+            quantize: Run the model with int8 dynamic quantization (CPU only).
+            tier: "final" clones the channel's reference voice with XTTS. "draft" uses
+                a fast VITS voice (draft_speaker) for previews; its clips are only
+                placeholders timing-wise and are re-synthesized for the final render.
+            draft_speaker: VCTK speaker of the draft engine.
         """
+        if tier not in TTS_ENGINES:
+            raise ValueError(f"Unknown TTS tier: {tier}")
+        model_name = model_name or TTS_ENGINES[tier]
         self.output_folder = output_folder
         self.device = device
+        self.model_name = model_name
+        self.tier = tier
+        self.draft_speaker = draft_speaker
+        # The draft engine is cheap enough in fp32
+        self.quantize = quantize and device == "cpu" and tier == "final"
+        # Quantized output differs from fp32, so it gets its own latent and audio cache entries
+        self.model_variant = f"{model_name}#int8" if self.quantize else model_name
+        if tier == "draft":
+            self.model_variant = f"{model_name}#{draft_speaker}"
+        self.last_rtf: Optional[float] = None
+        self.audio_cache = FileCache(cache_dir, cache_max_bytes, extension=".wav") if cache_dir else None
         self.logger = logging.getLogger(__name__)
         
         # Set up logging
@@ -42,7 +175,13 @@ class VoiceGenerator:
             self._clear_memory()
             self.speakerpath = None
             self.logger.info(f"Initializing TTS model {model_name} on {device}")
-            self.tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(device)
+            # Shared through the registry, so further generators reuse the loaded model
+            if quantize and not self.quantize and tier == "final":
+                self.logger.warning("int8 quantization is only supported on CPU, using the fp32 model")
+            if self.quantize:
+                self.tts = model_registry.get(self.model_variant, device, lambda: _load_quantized_tts(model_name))
+            else:
+                self.tts = model_registry.get(model_name, device, lambda: TTS(model_name).to(device))
             self.Motivational_speaker_path = "D:/AI_AGENT_FOR_YOUTUBE/Shorts_Agent/assets/clonningVoices/voice_preview_motivational coach.mp3"
             self.Mysterious_speaker_path = "D:/AI_AGENT_FOR_YOUTUBE/Shorts_Agent/assets/clonningVoices/voice_preview_cartermotivational.mp3"
             if channel == "motivational":
@@ -59,12 +198,138 @@ class VoiceGenerator:
             torch.cuda.empty_cache()
             gc.collect()
     
+    def speaker_latents(self, speaker_path: str) -> tuple:
+        """
+        XTTS conditioning latents (GPT latent, speaker embedding) for a reference voice.
+
+        Computed once per reference file and model version, then kept in memory and
+        under .cache/xtts_latents so later sentences, jobs and restarts skip it.
+        """
+        model = self.tts.synthesizer.tts_model
+        config = model.config
+        cond_args = {
+            "gpt_cond_len": config.gpt_cond_len,
+            "gpt_cond_chunk_len": config.gpt_cond_chunk_len,
+            "max_ref_length": config.max_ref_len,
+            "sound_norm_refs": config.sound_norm_refs
+        }
+        key = FileCache.make_key(file_hash(speaker_path), self.model_variant, TTS_VERSION, sorted(cond_args.items()))
+        if key in _speaker_latents:
+            return _speaker_latents[key]
+
+        cache_path = os.path.join(LATENT_CACHE_DIR, f"{key}.pt")
+        if os.path.exists(cache_path):
+            latents = torch.load(cache_path, map_location=self.device)
+            latents = (latents["gpt_cond_latent"], latents["speaker_embedding"])
+        else:
+            self.logger.info(f"Computing conditioning latents for {os.path.basename(speaker_path)}")
+            latents = model.get_conditioning_latents(audio_path=[speaker_path], **cond_args)
+            os.makedirs(LATENT_CACHE_DIR, exist_ok=True)
+            # Save under a temporary name first so a crash never leaves a partial file
+            temp_path = f"{cache_path}.part"
+            torch.save({"gpt_cond_latent": latents[0].cpu(), "speaker_embedding": latents[1].cpu()}, temp_path)
+            os.replace(temp_path, cache_path)
+        _speaker_latents[key] = latents
+        return latents
+
+    def _xtts_sampling_args(self) -> dict:
+        """Sampling settings tts_to_file passes to XTTS, taken from the model config"""
+        config = self.tts.synthesizer.tts_model.config
+        return {
+            "temperature": config.temperature,
+            "length_penalty": config.length_penalty,
+            "repetition_penalty": config.repetition_penalty,
+            "top_k": config.top_k,
+            "top_p": config.top_p
+        }
+
+    def _split(self, sentence: str, split_sentences: bool = True) -> List[str]:
+        return self.tts.synthesizer.split_into_sentences(sentence) if split_sentences else [sentence]
+
+    def _synthesize_xtts(self, sentence: str, filepath: str, split_sentences: bool = True) -> None:
+        """Same output as tts_to_file with speaker_wav, but with cached conditioning latents"""
+        model = self.tts.synthesizer.tts_model
+        gpt_cond_latent, speaker_embedding = self.speaker_latents(self.speakerpath)
+
+        wav = []
+        for part in self._split(sentence, split_sentences):
+            outputs = model.inference(part, "en", gpt_cond_latent, speaker_embedding, **self._xtts_sampling_args())
+            part_wav = outputs["wav"]
+            if torch.is_tensor(part_wav):
+                part_wav = part_wav.cpu().numpy()
+            wav += list(part_wav)
+            # Same pause between sentences as the TTS synthesizer
+            wav += [0] * 10000
+        self.tts.synthesizer.save_wav(wav, filepath)
+
+    def stream_voice(self, sentence: str, split_sentences: bool = True,
+                     stream_chunk_size: int = 20) -> Iterator[np.ndarray]:
+        """
+        Yield float32 audio chunks at the model's output rate as XTTS produces them,
+        so playback or muxing can start before the whole line is synthesized.
+        Time to first chunk and the real-time factor are logged at the end.
+        """
+        model = self.tts.synthesizer.tts_model
+        if not hasattr(model, "inference_stream"):
+            raise ValueError(f"{self.model_name} does not support streaming synthesis")
+        gpt_cond_latent, speaker_embedding = self.speaker_latents(self.speakerpath)
+        sample_rate = self.tts.synthesizer.output_sample_rate
+
+        start = time.perf_counter()
+        first_chunk_seconds = None
+        samples = 0
+        for part in self._split(sentence, split_sentences):
+            stream = model.inference_stream(part, "en", gpt_cond_latent, speaker_embedding,
+                                            stream_chunk_size=stream_chunk_size,
+                                            **self._xtts_sampling_args())
+            while True:
+                # Inference mode only around each model step, so the consumer's code
+                # between chunks doesn't run in it
+                with torch.inference_mode():
+                    chunk = next(stream, None)
+                    if chunk is not None:
+                        chunk = chunk.cpu().numpy().astype(np.float32)
+                if chunk is None:
+                    break
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - start
+                samples += len(chunk)
+                yield chunk
+            pause = np.zeros(10000, dtype=np.float32)
+            samples += len(pause)
+            yield pause
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(f"Streamed {samples / sample_rate:.2f}s of audio in {elapsed:.2f}s "
+                         f"(first chunk after {first_chunk_seconds or 0:.2f}s, "
+                         f"RTF {elapsed / (samples / sample_rate):.2f})")
+
+    @staticmethod
+    def normalize_text(sentence: str) -> str:
+        """Fold unicode variants, whitespace and case so equivalent lines share a cache entry"""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", sentence)).strip().lower()
+
+    def audio_cache_key(self, sentence: str, language: str = "en", split_sentences: bool = True) -> str:
+        return FileCache.make_key(
+            self.normalize_text(sentence),
+            self.draft_speaker if self.tier == "draft" else file_hash(self.speakerpath),
+            language,
+            self.model_variant,
+            TTS_VERSION,
+            split_sentences
+        )
+
+    def cache_stats(self) -> Optional[dict]:
+        """Hit/miss statistics of the audio cache, or None if it is disabled"""
+        return self.audio_cache.stats() if self.audio_cache else None
+
     def generate_voice(self, 
                        sentence: str, 
                        filename: str = "output.wav",
                        speaker: str = "p267",
                        speed: float = 0.2,
-                       split_sentences: bool = True) -> Optional[str]:
+                       split_sentences: bool = True,
+                       clear_memory: bool = True) -> Optional[str]:
         """
         Generate voice for a single sentence.
         
@@ -74,6 +339,7 @@ class VoiceGenerator:
             speaker: Selected speaker key from available speakers.
             speed: Speed factor for the synthesized speech.
             split_sentences: Enable sentence splitting for natural pauses.
+            clear_memory: Empty the CUDA cache and collect garbage around the call.
             
         Returns:
             Path to generated file or None if generation failed.
@@ -84,16 +350,36 @@ class VoiceGenerator:
         filepath = os.path.join(self.output_folder, filename)
         
         try:
-            self._clear_memory()
+            cache_key = None
+            if self.audio_cache:
+                cache_key = self.audio_cache_key(sentence, split_sentences=split_sentences)
+                if self.audio_cache.fetch(cache_key, filepath):
+                    self.logger.info(f"Reused cached voice for text: {sentence[:50]}...")
+                    return filepath
+
+            if clear_memory:
+                self._clear_memory()
             self.logger.info(f"Generating voice for text: {sentence[:50]}...")
 
-            self.tts.tts_to_file(
-                text=sentence,
-                speaker_wav=self.speakerpath,
-                language="en",
-                file_path=filepath,
-                split_sentences=split_sentences
-            )
+            if self.tier == "draft":
+                self.tts.tts_to_file(
+                    text=sentence,
+                    speaker=self.draft_speaker,
+                    file_path=filepath,
+                    split_sentences=split_sentences
+                )
+            elif hasattr(self.tts.synthesizer.tts_model, "get_conditioning_latents"):
+                self._synthesize_xtts(sentence, filepath, split_sentences=split_sentences)
+            else:
+                self.tts.tts_to_file(
+                    text=sentence,
+                    speaker_wav=self.speakerpath,
+                    language="en",
+                    file_path=filepath,
+                    split_sentences=split_sentences
+                )
+            if cache_key:
+                self.audio_cache.store(cache_key, filepath)
             self.logger.info(f"Voice generated successfully at: {filepath}")
             return filepath
             
@@ -101,14 +387,17 @@ class VoiceGenerator:
             self.logger.error(f"Error generating voice: {str(e)}")
             return None
         finally:
-            self._clear_memory()
+            if clear_memory:
+                self._clear_memory()
             
     def generate_multiple_voices(self, 
                                  sentences: List[str], 
                                  base_filename: str = "voicescript",
                                  speaker: str = "p267",
                                  speed: float = 0.2,
-                                 split_sentences: bool = True) -> Dict[str, str]:
+                                 split_sentences: bool = True,
+                                 batched: bool = False,
+                                 workers: Optional[int] = None) -> Dict[str, str]:
         """
         Generate voice files for multiple sentences with sequential naming.
         
@@ -118,12 +407,87 @@ class VoiceGenerator:
             speaker: Selected speaker key from available speakers.
             speed: Speed factor for the synthesized speech.
             split_sentences: Enable sentence splitting for natural pauses.
+            batched: Synthesize all sentences in one inference-mode session, clearing
+                memory once for the batch instead of around every sentence.
+            workers: On CPU, number of forked worker processes sharing the loaded model
+                copy-on-write. Falls back to sequential synthesis where fork is unavailable.
             
         Returns:
             Dictionary mapping each sentence to its output filepath.
+            The real-time factor of the run is kept in self.last_rtf.
         """
         results = {}
+        start = time.perf_counter()
+        if batched:
+            self._clear_memory()
         
+        if workers and workers > 1 and self._can_fork():
+            self._generate_in_pool(sentences, results, base_filename, split_sentences, workers)
+        else:
+            with torch.inference_mode() if batched else nullcontext():
+                self._generate_each(sentences, results, base_filename, speaker, split_sentences, batched)
+
+        if batched:
+            self._clear_memory()
+        elapsed = time.perf_counter() - start
+        audio_seconds = sum(media_probe.duration(filepath) for filepath in results.values())
+        self.last_rtf = elapsed / audio_seconds if audio_seconds else None
+        if self.last_rtf is not None:
+            self.logger.info(f"Synthesized {audio_seconds:.1f}s of audio in {elapsed:.1f}s (RTF {self.last_rtf:.2f})")
+        return results
+
+    def _can_fork(self) -> bool:
+        if self.device != "cpu":
+            self.logger.info("TTS worker pool is CPU only, synthesizing sequentially")
+            return False
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.logger.info("fork is not available on this platform, synthesizing sequentially")
+            return False
+        return True
+
+    def _generate_in_pool(self, sentences: List[str], results: Dict[str, str], base_filename: str,
+                          split_sentences: bool, workers: int) -> None:
+        """Synthesize sentences in forked workers that inherit the loaded model, keeping their order"""
+        global _pool_generator
+        generated = {}
+        jobs = []
+        for i, sentence in enumerate(sentences, 1):
+            filename = f"{base_filename}{i}.wav"
+            # Serve cache hits here, so the hit statistics stay in this process
+            if self.audio_cache and self.audio_cache.fetch(
+                    self.audio_cache_key(sentence, split_sentences=split_sentences),
+                    os.path.join(self.output_folder, filename)):
+                generated[sentence] = os.path.join(self.output_folder, filename)
+                continue
+            jobs.append((sentence, filename, split_sentences))
+        if jobs:
+            if hasattr(self.tts.synthesizer.tts_model, "get_conditioning_latents"):
+                # Compute the latents before forking so every worker inherits them
+                self.speaker_latents(self.speakerpath)
+            workers = min(workers, len(jobs))
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            self.logger.info(f"Synthesizing {len(jobs)} sentences with {workers} workers, {threads} threads each")
+            _pool_generator = self
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+                                         initializer=_init_tts_worker, initargs=(threads,)) as pool:
+                    filepaths = list(pool.map(_generate_in_worker, jobs))
+            finally:
+                _pool_generator = None
+
+            for (sentence, _, _), filepath in zip(jobs, filepaths):
+                if filepath:
+                    generated[sentence] = filepath
+                else:
+                    self.logger.warning(f"Failed to generate voice for sentence: {sentence[:50]}")
+
+        # Cache hits and pool outputs together, in sentence order
+        for sentence in sentences:
+            if sentence in generated:
+                results[sentence] = generated[sentence]
+
+    def _generate_each(self, sentences: List[str], results: Dict[str, str], base_filename: str,
+                       speaker: str, split_sentences: bool, batched: bool) -> None:
         for i, sentence in enumerate(sentences, 1):
             filename = f"{base_filename}{i}.wav"
             
@@ -133,7 +497,8 @@ class VoiceGenerator:
                     filename,
                     speaker=speaker,
                     speed=0.5,   
-                    split_sentences=split_sentences
+                    split_sentences=split_sentences,
+                    clear_memory=not batched
                 )
                 if filepath:
                     results[sentence] = filepath
@@ -143,8 +508,87 @@ class VoiceGenerator:
             except Exception as e:
                 self.logger.error(f"Error processing sentence {i}: {str(e)}")
                 continue
-                
-        return results
+
+def _quantization_benchmark_run(quantize, sentences, output_dir, channel):
+    """
+    Child process side of benchmark_quantization: print the RTF, peak RSS, resident
+    memory after garbage collection and the WAV paths as JSON
+    """
+    import resource
+    # Same sampling noise in both runs, so the similarity score measures the quantization
+    torch.manual_seed(0)
+    generator = VoiceGenerator(channel=channel, output_folder=output_dir, device="cpu", quantize=quantize)
+    results = generator.generate_multiple_voices(sentences, base_filename="bench")
+    gc.collect()
+    print(json.dumps({
+        "rtf": generator.last_rtf,
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        # What the model holds once loading and synthesis transients are gone
+        "resident_mb": _resident_mb(),
+        "files": [results.get(sentence) for sentence in sentences]
+    }))
+
+def log_mel_similarity(reference_path: str, candidate_path: str, n_mels: int = 80) -> float:
+    """
+    Cosine similarity of two recordings' log-mel spectrograms, averaged along a DTW
+    alignment so small timing differences between the takes don't count. 1.0 is identical.
+    """
+    import librosa
+    reference, sample_rate = librosa.load(reference_path, sr=None)
+    candidate, _ = librosa.load(candidate_path, sr=sample_rate)
+
+    def frames(samples):
+        log_mel = np.log(librosa.feature.melspectrogram(y=samples, sr=sample_rate, n_mels=n_mels) + 1e-6)
+        return log_mel / (np.linalg.norm(log_mel, axis=0, keepdims=True) + 1e-9)
+
+    reference_frames, candidate_frames = frames(reference), frames(candidate)
+    cost = 1 - reference_frames.T @ candidate_frames
+    _, path = librosa.sequence.dtw(C=cost)
+    return float(np.mean(1 - cost[path[:, 0], path[:, 1]]))
+
+def benchmark_quantization(sentences: List[str], channel: str = "ChronoShift_Chronicles") -> Dict[str, dict]:
+    """
+    Synthesize the sentences with the fp32 and the int8 model, each in a fresh process
+    so peak RSS is measured per mode, and compare real-time factor, peak RSS and the
+    log-mel similarity of the int8 audio to the fp32 audio. The int8 model is
+    quantized and cached first, so its run loads it without the fp32 checkpoint.
+    """
+    results = {}
+    if not os.path.exists(_quantized_cache_path(TTS_ENGINES["final"])):
+        print("Quantizing the model once before the benchmark...")
+        subprocess.run(
+            [sys.executable, "-c",
+             "import sys\n"
+             "from Agents.voiceGeneration import _load_quantized_tts\n"
+             "_load_quantized_tts(sys.argv[1])",
+             TTS_ENGINES["final"]],
+            check=True
+        )
+    with tempfile.TemporaryDirectory() as output_dir:
+        for mode, quantize in (("fp32", False), ("int8", True)):
+            completed = subprocess.run(
+                [sys.executable, "-c",
+                 "import json, sys\n"
+                 "from Agents.voiceGeneration import _quantization_benchmark_run\n"
+                 "_quantization_benchmark_run(sys.argv[1] == 'int8', json.loads(sys.argv[2]), sys.argv[3], sys.argv[4])",
+                 mode, json.dumps(sentences), os.path.join(output_dir, mode), channel],
+                check=True, capture_output=True, text=True
+            )
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        similarities = [
+            log_mel_similarity(reference, candidate)
+            for reference, candidate in zip(results["fp32"]["files"], results["int8"]["files"])
+            if reference and candidate
+        ]
+        results["int8"]["similarity"] = float(np.mean(similarities)) if similarities else None
+
+    for mode in ("fp32", "int8"):
+        print(f"{mode}: RTF {results[mode]['rtf'] or 0:.2f}, peak RSS {results[mode]['peak_rss_mb']:.0f} MB, "
+              f"resident after GC {results[mode]['resident_mb'] or 0:.0f} MB")
+    print(f"int8 vs fp32 log-mel similarity: {results['int8']['similarity'] or 0:.3f}")
+    return results
 
 # # Example usage:
 if __name__ == "__main__":
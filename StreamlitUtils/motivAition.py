@@ -16,6 +16,8 @@ from Agents.editAgent import VideoEditor
 from utils.utils import DirectoryManager
 from PIL import Image, ImageDraw
 
+IMAGE_BACKENDS = ["huggingface", "onnx", "procedural"]
+
 class StreamlitInterfaceMotivAition:
     def __init__(self):
         self.config = Config()
@@ -47,6 +49,13 @@ class StreamlitInterfaceMotivAition:
             "custom_voice_scripts": None,
             "custom_image_prompts": None,
             "include_caption": st.sidebar.checkbox("Include captioning", value=False),
+            "draft": st.sidebar.checkbox("Draft preview (fast, low resolution)", value=False),
+            "image_backend": st.sidebar.selectbox(
+                "Image backend", IMAGE_BACKENDS,
+                # Start from the configured backend
+                index=IMAGE_BACKENDS.index(self.config.image_backend)
+                if self.config.image_backend in IMAGE_BACKENDS else 0
+            ),
             "use_custom_bg_music": st.sidebar.checkbox("Provide custom background music?", value=False),
             "custom_bg_music_file": None
         }
@@ -94,7 +103,9 @@ class StreamlitInterfaceMotivAition:
                             custom_voice_scripts=inputs["custom_voice_scripts"],
                             custom_image_prompts=inputs["custom_image_prompts"],
                             include_caption=inputs["include_caption"],
-                            custom_bg_music_path=custom_bg_music_path
+                            custom_bg_music_path=custom_bg_music_path,
+                            tier="draft" if inputs["draft"] else "final",
+                            image_backend=inputs["image_backend"]
                         )
                     else:
                         final_video_path = self.video_generator.generate_video(
@@ -104,32 +115,45 @@ class StreamlitInterfaceMotivAition:
                             custom_voice_scripts=inputs["custom_voice_scripts"],
                             custom_image_prompts=inputs["custom_image_prompts"],
                             include_caption=inputs["include_caption"],
-                            custom_bg_music_path=custom_bg_music_path
+                            custom_bg_music_path=custom_bg_music_path,
+                            tier="draft" if inputs["draft"] else "final",
+                            image_backend=inputs["image_backend"]
                         )
                     
                     # Display final video
-                    st.header("Final Video")
-                    if os.path.exists(final_video_path):
-                        with open(final_video_path, "rb") as video_file:
-                            video_bytes = video_file.read()
-                        
-                        video_base64 = base64.b64encode(video_bytes).decode("utf-8")
-                        
-                        video_html = f"""
-                        <div style="display: flex; justify-content: center;">
-                        <video controls style="max-width: 100%; height: auto; border: 1px solid #ddd; border-radius: 4px;">
-                            <source src="data:video/mp4;base64,{video_base64}" type="video/mp4">
-                            Your browser does not support the video tag.
-                        </video>
-                        </div>
-                        """
-                        st.markdown(video_html, unsafe_allow_html=True)
-                    else:
-                        st.error("Final video file not found!")
+                    self.show_video(final_video_path, "Draft Preview" if inputs["draft"] else "Final Video")
                         
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
 
+        if st.button("Promote Draft to Final"):
+            try:
+                with st.spinner("Rendering final video from the draft assets..."):
+                    final_video_path = self.video_generator.promote_draft()
+                    self.show_video(final_video_path, "Final Video")
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+
+    def show_video(self, video_path: str, header: str):
+        st.header(header)
+        if os.path.exists(video_path):
+            with open(video_path, "rb") as video_file:
+                video_bytes = video_file.read()
+            
+            video_base64 = base64.b64encode(video_bytes).decode("utf-8")
+            
+            video_html = f"""
+            <div style="display: flex; justify-content: center;">
+            <video controls style="max-width: 100%; height: auto; border: 1px solid #ddd; border-radius: 4px;">
+                <source src="data:video/mp4;base64,{video_base64}" type="video/mp4">
+                Your browser does not support the video tag.
+            </video>
+            </div>
+            """
+            st.markdown(video_html, unsafe_allow_html=True)
+        else:
+            st.error(f"{header} file not found!")
+
 # if __name__ == "__main__":
 #     app = StreamlitInterfaceMotivAition()
 
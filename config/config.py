@@ -9,4 +9,5 @@ class Config:
             os.getenv("HUGGING_FACE2")
         ]
         self.deepgram_api_key = os.getenv("DEEPGRAM_API_KEY")
-        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
+        self.image_backend = os.getenv("IMAGE_BACKEND", "huggingface")
\ No newline at end of file
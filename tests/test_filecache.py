@@ -0,0 +1,31 @@
+from utils.filecache import FileCache
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_rewriting_fetched_file_keeps_entry(tmp_path):
+    cache = FileCache(str(tmp_path / "cache"), extension=".wav")
+    output = str(tmp_path / "voicescript1.wav")
+    write(output, b"line A")
+    cache.store("a", output)
+
+    assert cache.fetch("a", output)
+    # The next miss for the same filename writes its output in place
+    write(output, b"line B")
+
+    assert read(cache.path_for("a")) == b"line A"
+
+
+def test_fetch_miss(tmp_path):
+    cache = FileCache(str(tmp_path / "cache"))
+
+    assert not cache.fetch("missing", str(tmp_path / "out"))
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("PIL")
+
+import Agents.imageGeneration as imageGeneration
+from Agents.imageBackends import ImageBackend
+from Agents.imageGeneration import ImageGenerator
+
+
+class StubBackend(ImageBackend):
+    """Writes a few bytes after a per-prompt delay; the first call of a prompt in `slow_first` is slow"""
+    name = "stub"
+    requires_keys = False
+
+    def __init__(self, latency=0.05, slow_first=None, num_keys=2):
+        self.latency = latency
+        self.slow_first = slow_first or {}
+        self.num_keys = num_keys
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def default_keys(self):
+        return [f"stub-key-{key_idx}" for key_idx in range(1, self.num_keys + 1)]
+
+    def generate(self, key, prompt, width, height, output_path):
+        with self._lock:
+            self.calls[prompt] = self.calls.get(prompt, 0) + 1
+            first_call = self.calls[prompt] == 1
+        time.sleep(self.slow_first.get(prompt, self.latency) if first_call else self.latency)
+        with open(output_path, "wb") as f:
+            f.write(prompt.encode("utf-8"))
+        return width, height
+
+
+class BurstGenerator(ImageGenerator):
+    """Lets every key start with a few requests, so the tests don't wait for refills"""
+    REQUEST_BURST = 3
+
+
+def count_waits(monkeypatch):
+    calls = []
+    original_wait = imageGeneration.wait
+
+    def counting_wait(*args, **kwargs):
+        calls.append(1)
+        return original_wait(*args, **kwargs)
+
+    monkeypatch.setattr(imageGeneration, "wait", counting_wait)
+    return calls
+
+
+def test_blocks_at_concurrency_limit(tmp_path, monkeypatch):
+    backend = StubBackend(latency=0.5, num_keys=2)
+    generator = BurstGenerator([], output_dir=str(tmp_path), backend=backend)
+    waits = count_waits(monkeypatch)
+
+    results = generator.generate_all_images(["a", "b", "c", "d"])
+
+    assert sorted(results) == [1, 2, 3, 4]
+    # Two rounds of two requests: a handful of wakeups, not a spin
+    assert len(waits) < 20
+
+
+def test_hedge_winner_ends_batch(tmp_path):
+    backend = StubBackend(latency=0.05, slow_first={"slow": 1.0}, num_keys=3)
+    generator = BurstGenerator([], output_dir=str(tmp_path), backend=backend, min_hedge_samples=3)
+
+    start = time.monotonic()
+    results = generator.generate_all_images(["a", "b", "c", "slow"])
+    elapsed = time.monotonic() - start
+
+    assert sorted(results) == [1, 2, 3, 4]
+    assert generator.hedges_won == 1
+    assert elapsed < 0.7
+    with open(results[4], "rb") as f:
+        assert f.read() == b"slow"
+
+    # The abandoned original deletes its temporary file once it finishes
+    time.sleep(1.0)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp.png")]
+
+
+def test_rate_limit_detection():
+    class HttpError(Exception):
+        def __init__(self, status_code):
+            super().__init__(f"{status_code} Client Error")
+            self.response = type("Response", (), {"status_code": status_code})()
+
+    assert ImageGenerator.is_rate_limited(HttpError(429))
+    assert ImageGenerator.is_rate_limited(Exception("429 Client Error: Too Many Requests for url"))
+    assert not ImageGenerator.is_rate_limited(HttpError(500))
+    assert not ImageGenerator.is_rate_limited(Exception("Wrote 4291 bytes to image_429.png"))
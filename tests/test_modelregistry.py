@@ -0,0 +1,27 @@
+from utils.modelregistry import ModelRegistry
+
+
+def test_explicit_size_counts_toward_budget():
+    registry = ModelRegistry(ram_budget_bytes=100)
+    first = registry.get("first", "cpu", object, size=lambda _: 80)
+    registry.get("second", "cpu", object, size=lambda _: 80)
+
+    assert registry.resident_bytes() == 80
+    assert registry.evictions == 1
+    # Evicted, so asking again loads a new instance
+    assert registry.get("first", "cpu", object, size=lambda _: 80) is not first
+
+
+def test_hit_returns_same_instance():
+    registry = ModelRegistry()
+    model = registry.get("model", "cpu", object)
+
+    assert registry.get("model", "cpu", object) is model
+    assert registry.hits == 1
+
+
+def test_stats_report_sizes():
+    registry = ModelRegistry()
+    registry.get("model", "cpu", object, size=lambda _: 42)
+
+    assert registry.stats()["models"] == {"model@cpu": 42}
@@ -0,0 +1,45 @@
+import time
+
+from utils.ratelimit import TokenBucket
+
+
+def grant_times(bucket, start, seconds, step=0.25):
+    """Try to take a token every `step` seconds and return the times a token was granted"""
+    granted = []
+    for tick in range(int(seconds / step)):
+        now = start + tick * step
+        if bucket.try_acquire(now):
+            granted.append(now)
+    return granted
+
+
+def max_in_window(times, window):
+    """Most grants inside any half-open rolling window of `window` seconds"""
+    return max(sum(1 for t in times if start <= t < start + window) for start in times)
+
+
+def test_burst_of_one_keeps_rolling_quota():
+    start = time.monotonic()
+    bucket = TokenBucket(3, 60, burst=1)
+
+    granted = grant_times(bucket, start, 300)
+
+    assert max_in_window(granted, 60) == 3
+    assert len(granted) == 15
+
+
+def test_full_burst_exceeds_rolling_quota():
+    start = time.monotonic()
+    bucket = TokenBucket(3, 60)
+
+    assert max_in_window(grant_times(bucket, start, 300), 60) > 3
+
+
+def test_penalize_blocks_until_deadline():
+    start = time.monotonic()
+    bucket = TokenBucket(3, 60, burst=1)
+    bucket.penalize(30, now=start)
+
+    assert not bucket.try_acquire(start + 29)
+    assert bucket.next_available(start + 29) == start + 30
+    assert bucket.try_acquire(start + 30)
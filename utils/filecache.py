@@ -0,0 +1,109 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+class FileCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3, extension: str = ""):
+        """
+        Content-addressed file cache with a size-bounded LRU eviction policy.
+
+        Entries are plain files named after their key. A file's mtime is bumped every
+        time it is served, so the oldest mtimes are evicted first once the directory
+        grows past max_bytes. Several processes can share one cache directory.
+
+        Args:
+            cache_dir: Directory holding the cached files.
+            max_bytes: Size cap for the whole directory.
+            extension: Suffix appended to every cached file name (e.g. ".mp4").
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash any mix of bytes, strings and numbers into a cache key"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, (bytes, bytearray, memoryview)):
+                part = str(part).encode("utf-8")
+            # Length-prefix every part so ("ab", "c") and ("a", "bc") differ
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{self.extension}")
+
+    def fetch(self, key: str, dest_path: str) -> bool:
+        """Copy a cached entry to dest_path. Returns False on a miss."""
+        cached_path = self.path_for(key)
+        if not os.path.exists(cached_path):
+            self.misses += 1
+            return False
+
+        # A copy, not a hard link: writers such as ffmpeg -y or save_wav reopen their
+        # output with 'wb', which would rewrite a linked cache entry under its old key.
+        # Remove dest_path first in case it is still linked to an entry from an older run.
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            shutil.copyfile(cached_path, dest_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False  # Evicted by another process before we copied it
+        try:
+            os.utime(cached_path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return True
+
+    def store(self, key: str, src_path: str) -> str:
+        """Copy src_path into the cache and evict old entries if needed"""
+        cached_path = self.path_for(key)
+        # Write under a temporary name first so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        os.close(fd)
+        shutil.copyfile(src_path, temp_path)
+        os.replace(temp_path, cached_path)
+        self.evict()
+        return cached_path
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".part"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,99 @@
+import io
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_size(header: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the IHDR chunk at the start of a PNG file, or None if it isn't a PNG"""
+    if len(header) < 24 or not header.startswith(PNG_SIGNATURE) or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+class ImageTransport:
+    API_URL = "https://router.huggingface.co/hf-inference/models/{model}"
+
+    def __init__(self, model: str, timeout: float = 180, pool_size: int = 4):
+        """
+        HTTP transport for Hugging Face text-to-image requests.
+
+        Keeps one keep-alive requests.Session per API key, so repeated requests reuse
+        their connection instead of building a new client and TLS session each time.
+        A returned PNG that already has the target size is streamed to disk as is;
+        anything else is decoded, scaled and center-cropped to the target size if
+        needed, and saved as PNG.
+
+        Args:
+            model: Model id on the Hugging Face inference API.
+            timeout: Seconds to wait for a response.
+            pool_size: Connections kept open per key.
+        """
+        self.url = self.API_URL.format(model=model)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.passthrough_count = 0
+        self.resized_count = 0
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, key: str) -> requests.Session:
+        with self._lock:
+            if key not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.headers.update({"Authorization": f"Bearer {key}", "Accept": "image/png"})
+                self._sessions[key] = session
+            return self._sessions[key]
+
+    def text_to_image(self, key: str, prompt: str, width: int, height: int, output_path: str) -> Tuple[int, int]:
+        """
+        Generate an image and write it to output_path as a width x height PNG.
+        Returns the size of the image as received. Raises requests.HTTPError on
+        error responses (the status code is on error.response).
+        """
+        response = self.session_for(key).post(
+            self.url,
+            json={"inputs": prompt, "parameters": {"width": width, "height": height}},
+            timeout=self.timeout,
+            stream=True
+        )
+        with response:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=64 * 1024)
+            header = b""
+            for chunk in chunks:
+                header += chunk
+                if len(header) >= 24:
+                    break
+
+            received_size = png_size(header)
+            if received_size == (width, height):
+                # Already what we want: no decode, no re-encode
+                with open(output_path, "wb") as f:
+                    f.write(header)
+                    for chunk in chunks:
+                        f.write(chunk)
+                self.passthrough_count += 1
+                return received_size
+
+            data = header + b"".join(chunks)
+        image = Image.open(io.BytesIO(data))
+        received_size = image.size
+        if image.size != (width, height):
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        image.save(output_path, format="PNG")
+        self.resized_count += 1
+        return received_size
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class MediaProbe:
+    def __init__(self, max_workers: int = 4):
+        """
+        Duration and frame size lookups for media files, cached per file version.
+
+        WAV files are answered from their RIFF header without decoding any audio.
+        Everything else goes through one `ffprobe -print_format json` call per file,
+        which returns duration and dimensions together. Results are cached under
+        (absolute path, mtime, size), so a rewritten file is probed again.
+
+        Args:
+            max_workers: Number of ffprobe processes run at once by probe_many.
+        """
+        self.max_workers = max_workers
+        self._cache: Dict[Tuple[str, int, int], dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(path: str) -> Tuple[str, int, int]:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _read_wav_header(path: str) -> dict:
+        with wave.open(path, 'rb') as wav_file:
+            return {
+                'duration': wav_file.getnframes() / float(wav_file.getframerate()),
+                'width': None,
+                'height': None
+            }
+
+    @staticmethod
+    def _run_ffprobe(path: str) -> dict:
+        output = subprocess.check_output([
+            'ffprobe',
+            '-v', 'error',
+            '-print_format', 'json',
+            '-show_entries', 'format=duration:stream=codec_type,width,height',
+            path
+        ], universal_newlines=True)
+        data = json.loads(output)
+
+        info = {
+            'duration': float(data.get('format', {}).get('duration', 0) or 0),
+            'width': None,
+            'height': None
+        }
+        for stream in data.get('streams', []):
+            if stream.get('codec_type') == 'video':
+                info['width'] = int(stream['width'])
+                info['height'] = int(stream['height'])
+                break
+        return info
+
+    def _probe_uncached(self, path: str) -> dict:
+        if path.lower().endswith('.wav'):
+            try:
+                return self._read_wav_header(path)
+            except (wave.Error, EOFError):
+                pass  # Compressed or float WAV, let ffprobe parse it
+        return self._run_ffprobe(path)
+
+    def probe_many(self, paths: List[str]) -> Dict[str, dict]:
+        """Probe several files at once, running the ffprobe calls for cache misses concurrently"""
+        results = {}
+        missing = []
+        with self._lock:
+            for path in paths:
+                key = self._cache_key(path)
+                if key in self._cache:
+                    results[path] = self._cache[key]
+                else:
+                    missing.append((path, key))
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                probed = list(pool.map(self._probe_uncached, [path for path, _ in missing]))
+            with self._lock:
+                for (path, key), info in zip(missing, probed):
+                    self._cache[key] = info
+                    results[path] = info
+        return results
+
+    def probe(self, path: str) -> dict:
+        """Return {'duration', 'width', 'height'} for one file"""
+        return self.probe_many([path])[path]
+
+    def duration(self, path: str) -> float:
+        """Duration in seconds"""
+        return self.probe(path)['duration']
+
+    def dimensions(self, path: str) -> Optional[Tuple[int, int]]:
+        """(width, height) of the first video stream, or None for audio-only files"""
+        info = self.probe(path)
+        if info['width'] is None:
+            return None
+        return info['width'], info['height']
+
+
+# Shared instance so every agent hits the same cache
+media_probe = MediaProbe()
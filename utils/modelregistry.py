@@ -0,0 +1,113 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ModelRegistry:
+    def __init__(self, ram_budget_bytes: Optional[int] = None):
+        """
+        Process-wide cache of loaded models, shared by every agent.
+
+        Models are loaded lazily on first use and keyed by (name, device), so every
+        caller asking for the same model gets the same instance. The memory of each
+        model is estimated from its parameters and buffers; when the total goes over
+        the budget, the least recently used models are dropped. A caller that still
+        holds a reference keeps its model alive until it lets go.
+
+        Args:
+            ram_budget_bytes: Memory budget for all models together. Defaults to the
+                MODEL_RAM_BUDGET_MB environment variable, or no limit if it isn't set.
+        """
+        if ram_budget_bytes is None and os.getenv("MODEL_RAM_BUDGET_MB"):
+            ram_budget_bytes = int(float(os.getenv("MODEL_RAM_BUDGET_MB")) * 1024 ** 2)
+        self.ram_budget_bytes = ram_budget_bytes
+        self._models: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        # Reentrant so a loader can fetch the models it depends on
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def model_bytes(model: Any) -> int:
+        """Bytes held by a torch module's parameters and buffers (0 for anything else)"""
+        if not hasattr(model, "parameters") or not hasattr(model, "buffers"):
+            return 0
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+    def get(self, name: str, device: str, loader: Callable[[], Any],
+            size: Optional[Callable[[Any], int]] = None) -> Any:
+        """
+        Return the model for (name, device), calling loader() to load it on a miss.
+        size(model) gives its memory in bytes for models that aren't torch modules
+        (model_bytes would count them as 0).
+        """
+        key = (name, str(device))
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+
+            print(f"Loading model {name} on {device}...")
+            model = loader()
+            self._models[key] = (model, (size or self.model_bytes)(model))
+            self.loads += 1
+            self.evict(keep=key)
+            return model
+
+    def release(self, name: str, device: str) -> None:
+        """Drop a model from the registry"""
+        with self._lock:
+            if self._models.pop((name, str(device)), None) is not None:
+                self._free_memory()
+
+    def evict(self, keep: Optional[Tuple[str, str]] = None) -> None:
+        """Drop least recently used models until the resident total fits the budget"""
+        if self.ram_budget_bytes is None:
+            return
+        with self._lock:
+            evicted = False
+            for key in list(self._models):
+                if self.resident_bytes() <= self.ram_budget_bytes:
+                    break
+                if key == keep:
+                    continue
+                _, size = self._models.pop(key)
+                print(f"Evicting model {key[0]} on {key[1]} ({size / 1024 ** 2:.0f} MB)")
+                self.evictions += 1
+                evicted = True
+            if evicted:
+                self._free_memory()
+
+    @staticmethod
+    def _free_memory() -> None:
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": {f"{name}@{device}": size for (name, device), (_, size) in self._models.items()},
+                "resident_bytes": self.resident_bytes(),
+                "ram_budget_bytes": self.ram_budget_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+
+# Shared instance so every agent reuses the same loaded models
+model_registry = ModelRegistry()
@@ -0,0 +1,132 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, period: float, burst: Optional[float] = None):
+        """
+        Token bucket rate limiter: capacity requests per period, refilled continuously.
+
+        Unlike a fixed window counter, next_available() gives the exact time the next
+        request is allowed, so callers can sleep precisely that long instead of polling.
+
+        Args:
+            capacity: Number of requests allowed per period.
+            period: Length of the period in seconds.
+            burst: Most tokens the bucket holds, defaults to capacity. A full burst
+                plus the refill during one period allows burst + capacity requests
+                in a rolling period, so a hard quota needs a burst of 1.
+        """
+        self.rate = capacity / period
+        self.capacity = capacity if burst is None else burst
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        # Threads can pass timestamps taken slightly out of order; never refill backwards
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+
+    def next_available(self, now: Optional[float] = None) -> float:
+        """monotonic() time at which a token will be available (now if one already is)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._refill(now)
+            ready = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+            return max(ready, self.blocked_until)
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """Take a token if one is available"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._refill(now)
+            if now < self.blocked_until or self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def penalize(self, seconds: float, now: Optional[float] = None) -> None:
+        """Empty the bucket and block it for `seconds`, e.g. after the server answered 429"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._refill(now)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class AimdLimiter:
+    def __init__(self, initial: float = 2, minimum: float = 1, maximum: float = 16,
+                 decrease_factor: float = 0.5):
+        """
+        Additive-increase / multiplicative-decrease limit on concurrent requests.
+
+        Every success without congestion grows the limit by about one request per
+        window of `limit` successes; a rate-limit answer or a latency above the target
+        multiplies it by decrease_factor.
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self._lock = threading.Lock()
+
+    def on_success(self, latency: float, latency_target: Optional[float] = None) -> None:
+        with self._lock:
+            if latency_target is not None and latency > latency_target:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_congestion(self) -> None:
+        with self._lock:
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+    def allowed(self) -> int:
+        """Number of requests that may be in flight now"""
+        return int(self.limit)
+
+
+class LatencyHistogram:
+    # Upper bounds of the histogram buckets in seconds; the last bucket is open ended
+    BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+    def __init__(self, window: int = 200):
+        """Latency histogram with log-spaced buckets, plus the last `window` samples for percentiles"""
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of the recent samples, or None without samples"""
+        with self._lock:
+            return percentile(self.samples, q)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            labels = [f"<{bound}s" for bound in self.BOUNDS] + [f">={self.BOUNDS[-1]}s"]
+            return {
+                "count": sum(self.counts),
+                "p50": percentile(self.samples, 50),
+                "p90": percentile(self.samples, 90),
+                "buckets": dict(zip(labels, self.counts))
+            }
+
+
+def percentile(samples: Iterable[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (0-100) of samples, or None if there are none"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from typing import List, Tuple
+from utils.mediaprobe import media_probe
+
+
+def scene_layout(channel: str = None, video_mode: bool = False) -> Tuple[int, Tuple[str, str]]:
+    """Number of images per voice script and the two effects they alternate between"""
+    if channel == "motivation":
+        # For video mode: 3 images per voice, for non-video mode: 5 images per voice
+        if video_mode:
+            return 3, ("zoom", "fade")
+        return 5, ("fade", "zoom")
+    return 2, ("fade", "zoom")
+
+
+def file_hash(path: str) -> str:
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_scene_manifest(image_paths: List[str], voice_paths: List[str],
+                         channel: str = None, video_mode: bool = False) -> dict:
+    """
+    Describe every scene of a video: its voice clip, images, effects, durations and content hashes.
+
+    Images are assigned to voice clips in the order given, images_per_voice at a time.
+    """
+    images_per_voice, effects = scene_layout(channel, video_mode)
+    if len(image_paths) != images_per_voice * len(voice_paths):
+        raise ValueError(
+            f"Number of images ({len(image_paths)}) must be exactly {images_per_voice} "
+            f"times the number of voice files ({len(voice_paths)})"
+        )
+
+    manifest = {
+        "channel": channel,
+        "video_mode": video_mode,
+        "scenes": []
+    }
+    for voice_idx, voice_path in enumerate(voice_paths):
+        manifest["scenes"].append({
+            "index": voice_idx,
+            "voice_path": voice_path,
+            "images": [
+                {
+                    "index": voice_idx * images_per_voice + j,
+                    "path": image_paths[voice_idx * images_per_voice + j],
+                    # Alternate between the two effects of this layout
+                    "effect": effects[j % 2]
+                }
+                for j in range(images_per_voice)
+            ]
+        })
+    return refresh_scene_manifest(manifest)
+
+
+def validate_scene_manifest(manifest: dict) -> None:
+    """Raise ValueError if a scene is missing files or has a different image count than the others"""
+    scenes = manifest.get("scenes", [])
+    if not scenes:
+        raise ValueError("Scene manifest has no scenes")
+
+    missing = []
+    for scene in scenes:
+        if not os.path.exists(scene["voice_path"]):
+            missing.append(scene["voice_path"])
+        missing += [image["path"] for image in scene["images"] if not os.path.exists(image["path"])]
+    if missing:
+        raise ValueError(f"Scene manifest references missing files: {', '.join(missing)}")
+
+    images_per_voice = {len(scene["images"]) for scene in scenes}
+    if len(images_per_voice) != 1:
+        raise ValueError(f"Scenes have different numbers of images: {sorted(images_per_voice)}")
+
+
+def refresh_scene_manifest(manifest: dict) -> dict:
+    """Recompute content hashes and durations so edited files are picked up"""
+    validate_scene_manifest(manifest)
+    media_probe.probe_many([scene["voice_path"] for scene in manifest["scenes"]])
+    for scene in manifest["scenes"]:
+        scene["voice_hash"] = file_hash(scene["voice_path"])
+        scene["voice_duration"] = media_probe.duration(scene["voice_path"])
+        for image in scene["images"]:
+            image["hash"] = file_hash(image["path"])
+            image["duration"] = scene["voice_duration"] / len(scene["images"])
+    return manifest
+
+
+def scene_fingerprint(scene: dict) -> tuple:
+    """Everything about a scene's content that changes its rendered output"""
+    return (
+        scene["voice_hash"],
+        tuple((image["hash"], image["effect"]) for image in scene["images"])
+    )
+
+
+def diff_scene_manifests(previous: dict, current: dict) -> List[int]:
+    """Indices of scenes in current whose content differs from previous (or that are new)"""
+    previous_scenes = (previous or {}).get("scenes", [])
+    changed = []
+    for scene_idx, scene in enumerate(current["scenes"]):
+        if scene_idx >= len(previous_scenes) or \
+                scene_fingerprint(previous_scenes[scene_idx]) != scene_fingerprint(scene):
+            changed.append(scene_idx)
+    return changed
+
+
+def save_scene_manifest(manifest: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_scene_manifest(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
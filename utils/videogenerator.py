@@ -14,17 +14,63 @@ from Agents.voiceGeneration import VoiceGenerator
 from Agents.bgMusicAgent import VideoMusicSynchronizer
 from Agents.captionAgent import transcribe_and_caption
 from Agents.editAgent import VideoEditor
+from Agents.finishAgent import finish_video
 from utils.utils import DirectoryManager
+from utils.mediaprobe import media_probe
+from utils.scenemanifest import scene_layout, build_scene_manifest, save_scene_manifest, load_scene_manifest
 import streamlit as st
 from History.history import VideoHistoryTracker
 class VideoGenerator:
-    def __init__(self, config: Config,video_mode: bool = False):
+    DRAFT_JOB_FILE = os.path.join("output", "draft_job.json")
+    SCENE_MANIFEST_FILE = os.path.join("assets", "scene_manifest.json")
+
+    def __init__(self, config: Config,video_mode: bool = False, render_mode: str = "segments",
+                 segment_cache_dir: Optional[str] = None,
+                 scene_cache_dir: Optional[str] = os.path.join(".cache", "scenes"),
+                 fused_finish: bool = False, multi_rendition: bool = False, caption_mode: str = "whisper",
+                 caption_compositor: str = "libass", tts_cache_dir: Optional[str] = None,
+                 tts_batched: bool = False, tts_workers: Optional[int] = None, draft_voice: bool = False):
+        """
+        scene_cache_dir keeps every rendered scene, so a re-render after editing the
+        scene manifest only rebuilds the scenes that changed; None disables it.
+        caption_mode="script" times captions from the known voice scripts and the
+        editor's clip offsets instead of transcribing the edited video with Whisper.
+        caption_mode="clips" still uses Whisper, but transcribes the voice clips in
+        parallel and places them with the same clip offsets.
+        caption_compositor="sprites" draws the glowing captions from pre-rendered
+        sprites of the caption band instead of two full-frame libass passes and a blur.
+        tts_cache_dir reuses synthesized WAVs for lines that were voiced before.
+        tts_batched synthesizes the voice scripts without clearing memory between lines.
+        tts_workers synthesizes them in that many forked CPU workers.
+        draft_voice voices drafts with the fast VITS engine; promote_draft then
+        re-synthesizes the scripts with XTTS before the final render.
+        """
+        if caption_mode not in ("whisper", "script", "clips"):
+            raise ValueError(f"Unknown caption mode: {caption_mode}")
         self.content_agent = ContentAgent()
         self.script_agent = ScriptAgent()
         self.history_tracker = VideoHistoryTracker()
-        self.voice_generator = VoiceGenerator()
-        self.image_generator = ImageGenerator(api_keys=config.huggingface_api_keys,video_mode=video_mode)
-        self.video_editor = VideoEditor(video_mode=video_mode)
+        # Created per job for the channel's voice; the TTS model itself is shared via the model registry
+        self.voice_generator: Optional[VoiceGenerator] = None
+        self.tts_cache_dir = tts_cache_dir
+        self.tts_cache_stats: Optional[dict] = None
+        self.tts_batched = tts_batched
+        self.tts_workers = tts_workers
+        self.draft_voice = draft_voice
+        self.config = config
+        self.image_generator = ImageGenerator(api_keys=config.huggingface_api_keys,video_mode=video_mode,
+                                              backend=config.image_backend,
+                                              multi_rendition=multi_rendition)
+        self.video_mode = video_mode
+        self.fused_finish = fused_finish
+        self.multi_rendition = multi_rendition
+        self.caption_mode = caption_mode
+        self.caption_compositor = caption_compositor
+        self.rendition_paths: Dict[str, str] = {}
+        self.segment_cache_dir = segment_cache_dir
+        self.scene_cache_dir = scene_cache_dir
+        self.video_editor = VideoEditor(video_mode=video_mode, render_mode=render_mode,
+                                        cache_dir=segment_cache_dir, scene_cache_dir=scene_cache_dir)
         self.directory_manager = DirectoryManager()
         
     def _parse_script_output(self, script_output: str) -> Tuple[List[str], List[str]]:
@@ -117,10 +163,18 @@ class VideoGenerator:
                       custom_voice_scripts: Optional[str] = None,
                       custom_image_prompts: Optional[str] = None,
                       include_caption: bool = False,
-                      custom_bg_music_path: Optional[str] = None) -> str:
+                      custom_bg_music_path: Optional[str] = None,
+                      tier: str = "final",
+                      image_backend: Optional[str] = None) -> str:
         """
         Generate a complete video with the given parameters
         Returns the path to the final video
+
+        With tier="draft" a low resolution preview is rendered without captions or
+        music, and the job is saved so promote_draft can render the final video
+        from the same generated images and voices.
+        image_backend overrides the configured image backend for this job
+        ("huggingface", "procedural" or "onnx").
         # """
         self.directory_manager.clear_directories([
             os.path.join("assets", "VoiceScripts")
@@ -143,15 +197,20 @@ class VideoGenerator:
         if custom_voice_scripts and custom_image_prompts:
             voice_scripts = [line.strip() for line in custom_voice_scripts.splitlines() if line.strip()]
             image_prompts = [line.strip() for line in custom_image_prompts.splitlines() if line.strip()]
-            if channel != "motivation":
-                if len(image_prompts) != 2 * len(voice_scripts):
-                    raise ValueError("Number of image prompts must be exactly twice the number of voice scripts")
         else:
         # This part of the code is responsible for generating voice scripts and image prompts based on
         # the content provided. Here's a breakdown of what it does:
             print("Generating voice scripts and image prompts...")
             script_output = self.script_agent.generate_Scripts_Gemini(content, channel=channel,video_mode=video_mode)
             voice_scripts, image_prompts = self._parse_script_output(script_output)
+
+        # Catch a script/prompt mismatch before paying for any image generation
+        images_per_voice, _ = scene_layout(channel, video_mode)
+        if len(image_prompts) != images_per_voice * len(voice_scripts):
+            raise ValueError(
+                f"Number of image prompts ({len(image_prompts)}) must be exactly {images_per_voice} "
+                f"times the number of voice scripts ({len(voice_scripts)})"
+            )
         st.header("Voice Scripts")
         with st.container():
             st.markdown("""
@@ -207,15 +266,16 @@ class VideoGenerator:
         print(len(image_prompts))
         image_output_dir = os.path.join("assets", "images")
         self.directory_manager.ensure_directories_exist([image_output_dir])
-        self.image_generator.generate_all_images(image_prompts)
+        image_generator = self.image_generator
+        if image_backend and image_backend != self.image_generator.backend.name:
+            image_generator = ImageGenerator(api_keys=self.config.huggingface_api_keys, video_mode=self.video_mode,
+                                             backend=image_backend, multi_rendition=self.multi_rendition)
+        image_generator.generate_all_images(image_prompts)
         
         voice_output_dir = os.path.join("assets", "VoiceScripts")
         self.directory_manager.ensure_directories_exist([voice_output_dir])
-        if channel == "motivation":
-            self.voice_generator = VoiceGenerator(channel="motivation")
-        else: 
-            self.voice_generator = VoiceGenerator(channel="ChronoShift_Chronicles")
-        voice_results = self.voice_generator.generate_multiple_voices(voice_scripts)
+        voice_tier = "draft" if tier == "draft" and self.draft_voice else "final"
+        voice_results = self._generate_voices(voice_scripts, channel, voice_tier)
 
 
         st.sidebar.header("Generated Images")
@@ -239,23 +299,176 @@ class VideoGenerator:
         for sentence, filepath in voice_results.items():
             print(f"\nSentence: {sentence}")
             print(f"Generated file: {filepath}")
+
+        # ImageGenerator and VoiceGenerator number their files from 1 in script order
+        manifest = build_scene_manifest(
+            image_paths=[os.path.join(image_output_dir, f"image_{idx}.png") for idx in range(1, len(image_prompts) + 1)],
+            voice_paths=[os.path.join(voice_output_dir, f"voicescript{idx}.wav") for idx in range(1, len(voice_scripts) + 1)],
+            channel=channel,
+            video_mode=video_mode
+        )
+        save_scene_manifest(manifest, self.SCENE_MANIFEST_FILE)
+        self.history_tracker.add_entry(
+            title=title,
+            channel=channel,
+            content=content,
+            voice_scripts=voice_scripts,
+            image_prompts=image_prompts
+        )
+        if tier == "draft":
+            # With a scene cache, render scene by scene so a re-draft only rebuilds edited scenes
+            draft_editor = VideoEditor(video_mode=video_mode, tier="draft",
+                                       render_mode="segments" if self.scene_cache_dir else "filtergraph",
+                                       scene_cache_dir=self.scene_cache_dir)
+            output_path = os.path.join("output", "youtube_shorts_draft.mp4")
+            draft_editor.create_final_video(
+                image_dir=image_output_dir,
+                voice_dir=voice_output_dir,
+                output_path=output_path,
+                video_mode=video_mode,
+                channel=channel,
+                manifest_path=self.SCENE_MANIFEST_FILE
+            )
+            with open(self.DRAFT_JOB_FILE, "w") as f:
+                json.dump({
+                    "title": title,
+                    "channel": channel,
+                    "video_mode": video_mode,
+                    "include_caption": include_caption,
+                    "custom_bg_music_path": custom_bg_music_path,
+                    "image_dir": image_output_dir,
+                    "voice_dir": voice_output_dir,
+                    "manifest_path": self.SCENE_MANIFEST_FILE,
+                    "voice_scripts": voice_scripts,
+                    "voice_tier": voice_tier,
+                    # Scene timing of the draft edit, compared against the final voices on promotion
+                    "draft_voice_durations": [scene["voice_duration"] for scene in manifest["scenes"]]
+                }, f, indent=2)
+            return output_path
+
+        if self.multi_rendition:
+            return self._render_renditions(image_output_dir, voice_output_dir, channel, video_mode,
+                                           include_caption, custom_bg_music_path, voice_scripts)
+
         output_path = os.path.join("output", "youtube_shorts.mp4")
         self.video_editor.create_final_video(
             image_dir=image_output_dir,
             voice_dir=voice_output_dir,
             output_path=output_path,
             video_mode=video_mode,
-            channel=channel
+            channel=channel,
+            manifest_path=self.SCENE_MANIFEST_FILE
         )
-        self.history_tracker.add_entry(
-            title=title,
+        return self._finish_video(output_path, channel, video_mode, include_caption, custom_bg_music_path,
+                                  caption_clips=self._caption_clips(voice_scripts, self.video_editor,
+                                                                    self.SCENE_MANIFEST_FILE))
+
+    def _render_renditions(self, image_dir: str, voice_dir: str, channel: str, video_mode: bool,
+                           include_caption: bool, custom_bg_music_path: Optional[str],
+                           voice_scripts: Optional[List[str]] = None) -> str:
+        """
+        Render the Short and the long-form video from the same assets and finish both.
+        The finished paths are kept in self.rendition_paths; the one matching
+        video_mode is returned.
+        """
+        edited = self.video_editor.create_renditions(
+            image_dir=image_dir,
+            voice_dir=voice_dir,
+            outputs={
+                "shorts": os.path.join("output", "youtube_shorts.mp4"),
+                "video": os.path.join("output", "youtube_video.mp4")
+            },
+            video_mode=video_mode,
             channel=channel,
-            content=content,
-            voice_scripts=voice_scripts,
-            image_prompts=image_prompts
+            manifest_path=self.SCENE_MANIFEST_FILE
         )
-        if include_caption:
-            output_path = transcribe_and_caption(output_path,video_mode=video_mode)
+        # Both renditions share one timeline, so the caption timing is the same
+        caption_clips = self._caption_clips(voice_scripts or [], self.video_editor, self.SCENE_MANIFEST_FILE)
+        self.rendition_paths = {
+            name: self._finish_video(path, channel, name == "video", include_caption, custom_bg_music_path,
+                                     final_path=os.path.join("output", f"{name}_with_music.mp4"),
+                                     caption_clips=caption_clips)
+            for name, path in edited.items()
+        }
+        return self.rendition_paths["video" if video_mode else "shorts"]
+
+    def promote_draft(self) -> str:
+        """
+        Render the final video for the last draft, reusing its generated images and voices
+        Returns the path to the final video
+        """
+        if not os.path.exists(self.DRAFT_JOB_FILE):
+            raise ValueError("No draft to promote. Generate a draft preview first.")
+        with open(self.DRAFT_JOB_FILE, "r") as f:
+            job = json.load(f)
+
+        if job.get("voice_tier") == "draft":
+            # The draft was voiced by the fast engine: voice the same scripts with XTTS
+            # into the same clip files, the manifest refresh picks up the new timings
+            self._generate_voices(job["voice_scripts"], job["channel"], "final")
+            final_durations = [media_probe.duration(scene["voice_path"])
+                               for scene in load_scene_manifest(job["manifest_path"])["scenes"]]
+            drift = sum(final_durations) - sum(job["draft_voice_durations"])
+            print(f"Final voices are {drift:+.1f}s longer than the draft voices")
+
+        video_editor = self.video_editor
+        if job["video_mode"] != self.video_mode:
+            video_editor = VideoEditor(video_mode=job["video_mode"], render_mode=self.video_editor.render_mode,
+                                       cache_dir=self.segment_cache_dir, scene_cache_dir=self.scene_cache_dir)
+
+        output_path = os.path.join("output", "youtube_shorts.mp4")
+        video_editor.create_final_video(
+            image_dir=job["image_dir"],
+            voice_dir=job["voice_dir"],
+            output_path=output_path,
+            video_mode=job["video_mode"],
+            channel=job["channel"],
+            manifest_path=job["manifest_path"]
+        )
+        os.remove(self.DRAFT_JOB_FILE)
+        caption_clips = self._caption_clips(job.get("voice_scripts", []), video_editor, job["manifest_path"])
+        return self._finish_video(output_path, job["channel"], job["video_mode"],
+                                  job["include_caption"], job["custom_bg_music_path"],
+                                  caption_clips=caption_clips)
+
+    def _generate_voices(self, voice_scripts: List[str], channel: str, tier: str = "final") -> Dict[str, str]:
+        """Voice the scripts with the channel's voice on the given engine tier"""
+        voice_channel = "motivation" if channel == "motivation" else "ChronoShift_Chronicles"
+        self.voice_generator = VoiceGenerator(channel=voice_channel, cache_dir=self.tts_cache_dir, tier=tier)
+        voice_results = self.voice_generator.generate_multiple_voices(voice_scripts, batched=self.tts_batched,
+                                                                     workers=self.tts_workers)
+        self.tts_cache_stats = self.voice_generator.cache_stats()
+        if self.tts_cache_stats:
+            print(f"TTS cache: {self.tts_cache_stats['hits']} hits, {self.tts_cache_stats['misses']} misses "
+                  f"({self.tts_cache_stats['hit_rate']:.0%} hit rate)")
+        return voice_results
+
+    def _caption_clips(self, voice_scripts: List[str], video_editor: VideoEditor,
+                       manifest_path: str) -> Optional[List[dict]]:
+        """
+        Caption input for the "script" and "clips" caption modes: each voice script with
+        its clip and the clip's start in the last video rendered by video_editor.
+        Returns None (transcribe the video) in whisper mode or if the scripts don't match the scenes.
+        """
+        if self.caption_mode == "whisper":
+            return None
+        scenes = load_scene_manifest(manifest_path)["scenes"]
+        offsets = video_editor.last_clip_offsets
+        if not (len(voice_scripts) == len(scenes) == len(offsets)):
+            print("Voice scripts don't match the rendered scenes, captioning with Whisper")
+            return None
+        return [
+            {'text': text, 'audio_path': scene['voice_path'], 'start': start}
+            for text, scene, start in zip(voice_scripts, scenes, offsets)
+        ]
+
+    def _finish_video(self, output_path: str, channel: str, video_mode: bool,
+                      include_caption: bool, custom_bg_music_path: Optional[str],
+                      final_path: Optional[str] = None,
+                      caption_clips: Optional[List[dict]] = None) -> str:
+        """Add captions and background music to an edited video"""
+        script_clips = caption_clips if self.caption_mode == "script" else None
+        voice_clips = caption_clips if self.caption_mode == "clips" else None
         if channel == "motivation":
             if video_mode:
                 bg_music_path = custom_bg_music_path or os.path.join("assets", "Bg_Music", "yt_video_motivational.mp3")
@@ -264,6 +477,16 @@ class VideoGenerator:
         else:
             bg_music_path = custom_bg_music_path or os.path.join("assets", "Bg_Music", "clockbackgrounf.mp3")
         music_synchronizer = VideoMusicSynchronizer(bg_music_path)
-        final_video_path = music_synchronizer.sync_music_to_video(output_path)
+        if self.fused_finish:
+            return finish_video(output_path, music_synchronizer, include_caption=include_caption,
+                                output_path=final_path, video_mode=video_mode,
+                                script_clips=script_clips, voice_clips=voice_clips,
+                                compositor=self.caption_compositor)
+
+        if include_caption:
+            output_path = transcribe_and_caption(output_path,video_mode=video_mode,
+                                                 script_clips=script_clips, voice_clips=voice_clips,
+                                                 compositor=self.caption_compositor)
+        final_video_path = music_synchronizer.sync_music_to_video(output_path, output_path=final_path)
         
         return final_video_path
\ No newline at end of file